@@ -7,9 +7,22 @@ Updates the "fixed" CSV files with fresh data for Power BI refresh
 import sqlite3
 import pandas as pd
 import os
-from datetime import datetime
-import time
+import asyncio
+import csv
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from config.locations import LOCATIONS
+
+# PyArrow's C++ CSV writer is much faster than DataFrame.to_csv; fall back
+# to pandas when it isn't installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(
@@ -18,99 +31,244 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Only the columns Power BI uses; employees.face_encoding in particular is
+# raw float32 bytes that would otherwise dominate every row
+EMPLOYEES_EXPORT_QUERY = (
+    "SELECT id, name, email, department, is_active, created_at, location_id FROM employees"
+)
+TIME_LOGS_EXPORT_QUERY = (
+    "SELECT id, employee_id, clock_in, clock_out, date, duration_hours, status, created_at "
+    "FROM time_logs"
+)
+SYSTEM_LOGS_EXPORT_QUERY = (
+    "SELECT id, event_type, employee_id, message, timestamp FROM system_logs"
+)
+
+# Cheap per-table invalidation keys; a table is only re-exported when its
+# key differs from the one recorded at the last export
+CHANGE_KEY_QUERIES = {
+    'employees': "SELECT COUNT(*), MAX(created_at), MAX(updated_at) FROM employees",
+    'time_logs': "SELECT COUNT(*), MAX(id), MAX(updated_at) FROM time_logs",
+    'system_logs': "SELECT COUNT(*), MAX(id) FROM system_logs"
+}
+
+# system_logs grows without bound, so it is streamed in chunks of this many rows
+SYSTEM_LOGS_CHUNK_SIZE = 100_000
+
+# Write buffer for the csv.writer fallback used when PyArrow is missing
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
 class AutoUpdatingExporter:
     def __init__(self, db_path="stes.db", export_dir="powerbi_exports"):
         self.db_path = db_path
         self.export_dir = export_dir
         os.makedirs(self.export_dir, exist_ok=True)
         
+        # Keep one connection open for the exporter's lifetime so SQLite's
+        # page cache stays warm between refresh cycles. Autocommit mode
+        # (isolation_level=None) so update_fixed_files controls its own
+        # read transaction.
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA cache_size=-64000")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        # The exporter only ever reads
+        self.conn.execute("PRAGMA query_only=1")
+        
+        # Change keys of the tables as of their last export
+        self._export_keys = {}
+    
+    def close(self):
+        """Close the exporter's SQLite connection"""
+        if getattr(self, 'conn', None) is not None:
+            self.conn.close()
+            self.conn = None
+    
+    def __del__(self):
+        self.close()
+        
+    def _location_chunk(self, base_df, id_column, original_column, location, export_timestamp):
+        """
+        Build one location's copy of base_df
+        
+        id_column is shifted into the location's 1000-wide range and the
+        un-offset value is kept in original_column.
+        
+        Args:
+            base_df (pd.DataFrame): Rows read from the shared database
+            id_column (str): Column holding the ID to offset per location
+            original_column (str): Column that keeps the un-offset ID
+            location (dict): Location with 'id' and 'name'
+            export_timestamp (pd.Timestamp): Timestamp stamped on every row
+            
+        Returns:
+            pd.DataFrame: Rows for this location
+        """
+        return base_df.assign(**{
+            original_column: base_df[id_column],
+            id_column: base_df[id_column] + (location['id'] - 1) * 1000,
+            'location_id': location['id'],
+            'location_name': location['name'],
+            'export_timestamp': export_timestamp
+        })
+    
+    def _build_location_chunk(self, base_df, id_column, original_column, export_timestamp, schema, location):
+        """
+        Build one location's chunk ready for writing
+        
+        Pure function of its inputs so locations can be built concurrently.
+        
+        Returns:
+            pa.Table or pd.DataFrame: Arrow table when PyArrow is available
+        """
+        chunk = self._location_chunk(base_df, id_column, original_column, location, export_timestamp)
+        if PYARROW_AVAILABLE:
+            return pa.Table.from_pandas(chunk, preserve_index=False, schema=schema)
+        return chunk
+    
+    def _write_location_chunks(self, base_chunks, id_column, original_column, locations, export_timestamp, path):
+        """
+        Write one copy of each base chunk per location to a single CSV
+        
+        The per-location copies of each base chunk are built on a thread pool
+        (pandas and Arrow release the GIL for the heavy lifting) and then
+        written in location order, so only one base chunk's copies are held
+        in memory at a time. Uses PyArrow's CSVWriter when available and
+        otherwise streams rows through csv.writer into a buffered file.
+        
+        Args:
+            base_chunks (iterable): DataFrames read from the shared database
+            
+        Returns:
+            int: Total number of rows written
+        """
+        writer = None
+        schema = None
+        csv_file = None
+        total_rows = 0
+        try:
+            with ThreadPoolExecutor(max_workers=len(locations)) as executor:
+                for base_df in base_chunks:
+                    if base_df.empty:
+                        continue
+                    # Later chunks reuse the first chunk's schema
+                    build = partial(
+                        self._build_location_chunk,
+                        base_df, id_column, original_column, export_timestamp, schema
+                    )
+                    for chunk in executor.map(build, locations):
+                        if PYARROW_AVAILABLE:
+                            if writer is None:
+                                # A column with no values in the first chunk is
+                                # typed null, which later chunks' values can't be
+                                # cast to; write it as strings instead
+                                schema = pa.schema([
+                                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                    for field in chunk.schema
+                                ])
+                                writer = pv.CSVWriter(path, schema)
+                            if chunk.schema != schema:
+                                # The rest of the first chunk's locations were
+                                # built before the schema was fixed
+                                chunk = chunk.cast(schema)
+                            writer.write_table(chunk)
+                        else:
+                            if csv_file is None:
+                                csv_file = open(path, 'w', newline='', buffering=CSV_WRITE_BUFFER_SIZE)
+                                csv_writer = csv.writer(csv_file)
+                                csv_writer.writerow(chunk.columns)
+                            # Missing values become empty fields, as with to_csv
+                            rows = chunk.astype(object).where(chunk.notna(), None)
+                            csv_writer.writerows(rows.itertuples(index=False, name=None))
+                        total_rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+            if csv_file is not None:
+                csv_file.close()
+        return total_rows
+    
+    def _read_system_logs(self, conn):
+        """Yield system_logs in SYSTEM_LOGS_CHUNK_SIZE chunks with a numeric employee_id"""
+        for chunk in pd.read_sql_query(SYSTEM_LOGS_EXPORT_QUERY, conn, chunksize=SYSTEM_LOGS_CHUNK_SIZE):
+            # Nullable employee_id: keep it float64 in every chunk so the offset
+            # add is vectorized and chunks with no NULLs format the same way
+            chunk['employee_id'] = pd.to_numeric(chunk['employee_id']).astype('float64')
+            yield chunk
+    
+    def _table_changed(self, conn, table, path):
+        """
+        Check whether a table needs re-exporting
+        
+        Returns:
+            tuple: (changed, key) where key should be recorded after export
+        """
+        key = conn.execute(CHANGE_KEY_QUERIES[table]).fetchone()
+        changed = key != self._export_keys.get(table) or not os.path.exists(path)
+        return changed, key
+    
     def update_fixed_files(self):
         """Update the 'fixed' CSV files with fresh data"""
         print("🔄 Updating Power BI export files with fresh data...")
         
         try:
-            # Connect to SQLite database
-            conn = sqlite3.connect(self.db_path)
+            conn = self.conn
             print(f"✅ Connected to {self.db_path}")
             
-            # Sample location configurations (same as fix_multi_location_export.py)
-            locations = [
-                {"id": 1, "name": "Main Office", "db_path": self.db_path},
-                {"id": 2, "name": "Branch Office", "db_path": self.db_path},
-                {"id": 3, "name": "West Coast Office", "db_path": self.db_path}
-            ]
+            # One read transaction for the whole export: every SELECT sees the
+            # same snapshot and the WAL can't be checkpointed underneath it
+            conn.execute("BEGIN DEFERRED")
             
-            all_employees = []
-            all_time_logs = []
-            all_system_logs = []
+            # One timestamp per run, kept as a datetime64 column rather than strings
+            export_timestamp = pd.Timestamp.now()
+            location_names = ', '.join(location['name'] for location in LOCATIONS)
+            print(f"\n📊 Processing {len(LOCATIONS)} locations: {location_names}")
             
-            for location in locations:
-                location_id = location["id"]
-                location_name = location["name"]
-                
-                print(f"\n📊 Processing Location {location_id}: {location_name}")
-                
-                # Export employees with unique IDs
-                employees_df = pd.read_sql_query("SELECT * FROM employees", conn)
-                if not employees_df.empty:
-                    # Create unique employee IDs for this location
-                    employees_df['original_id'] = employees_df['id']
-                    employees_df['id'] = employees_df['id'] + (location_id - 1) * 1000  # Unique range per location
-                    employees_df['location_id'] = location_id
-                    employees_df['location_name'] = location_name
-                    employees_df['export_timestamp'] = datetime.now().isoformat()
-                    
-                    all_employees.append(employees_df)
-                    print(f"   ✅ employees: {len(employees_df)} records")
-                
-                # Export time logs with updated employee IDs
-                time_logs_df = pd.read_sql_query("SELECT * FROM time_logs", conn)
-                if not time_logs_df.empty:
-                    # Update employee_id to match the new unique IDs
-                    time_logs_df['original_employee_id'] = time_logs_df['employee_id']
-                    time_logs_df['employee_id'] = time_logs_df['employee_id'] + (location_id - 1) * 1000
-                    time_logs_df['location_id'] = location_id
-                    time_logs_df['location_name'] = location_name
-                    time_logs_df['export_timestamp'] = datetime.now().isoformat()
-                    
-                    all_time_logs.append(time_logs_df)
-                    print(f"   ✅ time_logs: {len(time_logs_df)} records")
-                
-                # Export system logs with updated employee IDs
-                system_logs_df = pd.read_sql_query("SELECT * FROM system_logs", conn)
-                if not system_logs_df.empty:
-                    # Update employee_id to match the new unique IDs (only for non-null values)
-                    system_logs_df['original_employee_id'] = system_logs_df['employee_id']
-                    system_logs_df['employee_id'] = system_logs_df['employee_id'].apply(
-                        lambda x: x + (location_id - 1) * 1000 if pd.notna(x) else x
+            # Every location reads the same tables, so each table is fetched once
+            # and the per-location copies are derived from it. Tables whose change
+            # key matches the last export are skipped entirely.
+            fixed_employees_path = os.path.join(self.export_dir, 'all_locations_employees_fixed.csv')
+            changed, key = self._table_changed(conn, 'employees', fixed_employees_path)
+            if not changed:
+                print("\n⏭️ employees unchanged since last export")
+            else:
+                employees_base = pd.read_sql_query(EMPLOYEES_EXPORT_QUERY, conn)
+                if not employees_base.empty:
+                    # Create unique employee IDs for each location
+                    employees_count = self._write_location_chunks(
+                        [employees_base], 'id', 'original_id', LOCATIONS, export_timestamp, fixed_employees_path
                     )
-                    system_logs_df['location_id'] = location_id
-                    system_logs_df['location_name'] = location_name
-                    system_logs_df['export_timestamp'] = datetime.now().isoformat()
-                    
-                    all_system_logs.append(system_logs_df)
-                    print(f"   ✅ system_logs: {len(system_logs_df)} records")
-            
-            # Combine all data and overwrite the "fixed" files
-            if all_employees:
-                combined_employees = pd.concat(all_employees, ignore_index=True)
-                fixed_employees_path = os.path.join(self.export_dir, 'all_locations_employees_fixed.csv')
-                combined_employees.to_csv(fixed_employees_path, index=False)
-                print(f"\n✅ Updated employees: {len(combined_employees)} records → {fixed_employees_path}")
+                    print(f"\n✅ Updated employees: {employees_count} records → {fixed_employees_path}")
+                self._export_keys['employees'] = key
             
-            if all_time_logs:
-                combined_time_logs = pd.concat(all_time_logs, ignore_index=True)
-                fixed_time_logs_path = os.path.join(self.export_dir, 'all_locations_time_logs_fixed.csv')
-                combined_time_logs.to_csv(fixed_time_logs_path, index=False)
-                print(f"✅ Updated time_logs: {len(combined_time_logs)} records → {fixed_time_logs_path}")
-            
-            if all_system_logs:
-                combined_system_logs = pd.concat(all_system_logs, ignore_index=True)
-                fixed_system_logs_path = os.path.join(self.export_dir, 'all_locations_system_logs_fixed.csv')
-                combined_system_logs.to_csv(fixed_system_logs_path, index=False)
-                print(f"✅ Updated system_logs: {len(combined_system_logs)} records → {fixed_system_logs_path}")
+            fixed_time_logs_path = os.path.join(self.export_dir, 'all_locations_time_logs_fixed.csv')
+            changed, key = self._table_changed(conn, 'time_logs', fixed_time_logs_path)
+            if not changed:
+                print("⏭️ time_logs unchanged since last export")
+            else:
+                time_logs_base = pd.read_sql_query(TIME_LOGS_EXPORT_QUERY, conn)
+                if not time_logs_base.empty:
+                    # Update employee_id to match the new unique IDs
+                    time_logs_count = self._write_location_chunks(
+                        [time_logs_base], 'employee_id', 'original_employee_id', LOCATIONS, export_timestamp, fixed_time_logs_path
+                    )
+                    print(f"✅ Updated time_logs: {time_logs_count} records → {fixed_time_logs_path}")
+                self._export_keys['time_logs'] = key
             
-            conn.close()
+            fixed_system_logs_path = os.path.join(self.export_dir, 'all_locations_system_logs_fixed.csv')
+            changed, key = self._table_changed(conn, 'system_logs', fixed_system_logs_path)
+            if not changed:
+                print("⏭️ system_logs unchanged since last export")
+            else:
+                # Update employee_id to match the new unique IDs (NaN stays NaN)
+                system_logs_count = self._write_location_chunks(
+                    self._read_system_logs(conn), 'employee_id', 'original_employee_id',
+                    LOCATIONS, export_timestamp, fixed_system_logs_path
+                )
+                if system_logs_count:
+                    print(f"✅ Updated system_logs: {system_logs_count} records → {fixed_system_logs_path}")
+                self._export_keys['system_logs'] = key
             
             print(f"\n🎉 Power BI export files updated successfully!")
             print(f"📁 Files updated in: {self.export_dir}/")
@@ -119,6 +277,30 @@ class AutoUpdatingExporter:
         except Exception as e:
             logger.error(f"❌ Error updating export files: {e}")
             raise
+        finally:
+            if self.conn.in_transaction:
+                self.conn.execute("COMMIT")
+    
+    def _refresh_cycle(self):
+        """Run one export and fold the WAL back into the main database"""
+        self.update_fixed_files()
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    async def run_continuous_update_async(self, interval_minutes=15):
+        """
+        Run continuous updates as an asyncio task
+        
+        The blocking export runs in a worker thread and the wait between
+        cycles is an asyncio sleep, so the event loop stays free for other
+        background jobs scheduled alongside the exporter.
+        
+        Args:
+            interval_minutes (int): Minutes between updates
+        """
+        while True:
+            await asyncio.to_thread(self._refresh_cycle)
+            print(f"\n⏰ Next update in {interval_minutes} minutes...")
+            await asyncio.sleep(interval_minutes * 60)
     
     def run_continuous_update(self, interval_minutes=15):
         """Run continuous updates at specified intervals"""
@@ -126,15 +308,14 @@ class AutoUpdatingExporter:
         print("Press Ctrl+C to stop")
         
         try:
-            while True:
-                self.update_fixed_files()
-                print(f"\n⏰ Next update in {interval_minutes} minutes...")
-                time.sleep(interval_minutes * 60)
+            asyncio.run(self.run_continuous_update_async(interval_minutes))
                 
         except KeyboardInterrupt:
             print("\n🛑 Continuous updates stopped by user")
         except Exception as e:
             logger.error(f"❌ Error in continuous update: {e}")
+        finally:
+            self.close()
 
 def main():
     """Main function"""
@@ -156,6 +337,7 @@ def main():
     else:
         # Single update
         exporter.update_fixed_files()
+        exporter.close()
         
         print(f"\n🎯 Next steps:")
         print(f"1. Power BI will automatically refresh from the updated files")
@@ -1,12 +1,12 @@
 import sqlite3
+import pandas as pd
 
 conn = sqlite3.connect('stes.db')
-cursor = conn.cursor()
 
 print("=== CURRENT STATUS FOR ARNAV ===")
-cursor.execute('SELECT id, employee_id, clock_in, clock_out, status FROM time_logs WHERE employee_id = 9 AND DATE(date) = ?', ('2025-07-15',))
-rows = cursor.fetchall()
-for row in rows:
-    print(f'ID: {row[0]}, Clock-in: {row[2]}, Clock-out: {row[3]}, Status: {row[4]}')
+# Day bounds instead of DATE(date) so the (employee_id, date) index is usable
+df = pd.read_sql('SELECT id, clock_in, clock_out, status FROM time_logs WHERE employee_id = ? AND date >= ? AND date < ?',
+                 conn, params=(9, '2025-07-15', '2025-07-16'))
+print(df.to_string(index=False))
 
 conn.close() 
\ No newline at end of file
@@ -2,14 +2,14 @@
 Configuration for Location 1: Main Office
 """
 
+from config.locations import get_location, FACE_RECOGNITION_TOLERANCE, COOLDOWN_MINUTES
+
+_location = get_location(1)
+
 # Location-specific settings
-LOCATION_ID = 1
-LOCATION_NAME = "Main Office"
-LOCATION_TIMEZONE = "America/New_York"
+LOCATION_ID = _location['id']
+LOCATION_NAME = _location['name']
+LOCATION_TIMEZONE = _location['timezone']
 
 # Database settings for this location
-DATABASE_URL = "sqlite:///stes_location_1.db"
-
-# Optional: Location-specific settings
-FACE_RECOGNITION_TOLERANCE = 0.6
-COOLDOWN_MINUTES = 10 
\ No newline at end of file
+DATABASE_URL = _location['database_url']
@@ -0,0 +1,29 @@
+"""
+Location table for Smart Time Entry System (STES)
+Single data-driven source for every site's ID, name, timezone and database
+"""
+
+# Shared per-location defaults
+FACE_RECOGNITION_TOLERANCE = 0.6
+COOLDOWN_MINUTES = 10
+
+LOCATIONS = [
+    {
+        'id': location_id,
+        'name': name,
+        'timezone': timezone,
+        'database_url': f'sqlite:///stes_location_{location_id}.db'
+    }
+    for location_id, name, timezone in [
+        (1, 'Main Office', 'America/New_York'),
+        (2, 'Branch Office', 'America/Chicago'),
+        (3, 'West Coast Office', 'America/Los_Angeles')
+    ]
+]
+
+def get_location(location_id):
+    """Get the location entry for a location ID"""
+    for location in LOCATIONS:
+        if location['id'] == location_id:
+            return location
+    raise KeyError(f"Unknown location ID: {location_id}")
@@ -6,21 +6,70 @@ Handles database connections and session management
 import os
 import sys
 from contextlib import contextmanager
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, event, func, case, cast, Float, select, insert
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 # Add the project root to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.database import Base, Employee, TimeLog, SystemLog
+from models.database import Base, Employee, TimeLog, SystemLog, face_encoding_bytes
 from config.config import get_config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Connection-level SQLite tuning: WAL lets readers run alongside the writer,
+# NORMAL sync is safe under WAL, and a bigger page cache/mmap cuts disk reads
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-131072",
+    "mmap_size=1073741824",
+)
+
+# Indexes replaced by wider ones in the models, dropped from older databases
+SUPERSEDED_INDEXES = (
+    "ix_systemlogs_emp",  # by ix_systemlogs_emp_ts
+)
+
+# Rows per bulk insert batch; one transaction covers all batches. Batches
+# are sent as Core executemany inserts, without building ORM objects
+BULK_INSERT_CHUNK_SIZE = 10000
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLITE_PRAGMAS to every new pooled SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+def open_db(path='stes.db'):
+    """
+    Open a plain sqlite3 connection with the same tuning as the ORM engine,
+    for scripts that query the database directly
+    
+    Args:
+        path (str): SQLite database file
+        
+    Returns:
+        sqlite3.Connection: Connection with SQLITE_PRAGMAS applied
+    """
+    import sqlite3
+    
+    conn = sqlite3.connect(path)
+    _set_sqlite_pragmas(conn, None)
+    # Standalone scripts may run before DatabaseManager has created the
+    # models' indexes; this one serves the per-employee day lookups
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS ix_timelogs_emp_date_created "
+        "ON time_logs (employee_id, date, created_at DESC)"
+    )
+    return conn
+
 class DatabaseManager:
     """
     Database manager class to handle connections and operations
@@ -49,18 +98,57 @@ class DatabaseManager:
                 pool_recycle=3600    # Recycle connections after 1 hour
             )
             
-            # Create session maker
-            self.session_maker = sessionmaker(bind=self.engine)
+            if self.engine.dialect.name == 'sqlite':
+                event.listen(self.engine, "connect", _set_sqlite_pragmas)
+            
+            # Create session maker; scoped so each thread reuses one Session
+            self.session_maker = scoped_session(sessionmaker(bind=self.engine))
             
             # Create tables if they don't exist
             Base.metadata.create_all(self.engine)
             
+            # create_all skips indexes on tables that already exist, so add
+            # any that older databases are missing
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(self.engine, checkfirst=True)
+            
+            if self.engine.dialect.name == 'sqlite':
+                with self.engine.begin() as conn:
+                    for index_name in SUPERSEDED_INDEXES:
+                        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+            
+            self._migrate_face_encodings()
+            
             logger.info(f"✅ Database initialized successfully: {self.config.DATABASE_URL}")
             
         except SQLAlchemyError as e:
             logger.error(f"❌ Database initialization failed: {e}")
             raise
     
+    def _migrate_face_encodings(self):
+        """
+        Rewrite face encodings still stored as JSON text as float32 bytes.
+        SQLite keeps each value's own storage class, so once every row is
+        bytes later runs find nothing to do.
+        """
+        if self.engine.dialect.name != 'sqlite':
+            return
+        
+        with self.engine.begin() as conn:
+            legacy_rows = conn.exec_driver_sql(
+                "SELECT id, face_encoding FROM employees WHERE typeof(face_encoding) = 'text'"
+            ).all()
+            updates = []
+            for employee_id, encoding in legacy_rows:
+                try:
+                    updates.append((face_encoding_bytes(encoding), employee_id))
+                except ValueError:
+                    logger.warning(f"⚠️ Employee {employee_id} has an unreadable face encoding; left as is")
+            if updates:
+                conn.exec_driver_sql("UPDATE employees SET face_encoding = ? WHERE id = ?", updates)
+                logger.info(f"✅ Migrated {len(updates)} face encodings to float32 bytes")
+    
     @contextmanager
     def get_session(self):
         """
@@ -80,6 +168,20 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def _read(self, statement, **params):
+        """
+        Run a read-only statement on a plain connection, skipping the ORM
+        
+        Args:
+            statement: SQLAlchemy Core selectable or text() clause
+            **params: Bound parameters for text() clauses
+            
+        Returns:
+            list: Result rows as mappings
+        """
+        with self.engine.connect() as conn:
+            return conn.execute(statement, params).mappings().all()
+    
     def create_employee(self, name, face_encoding, email=None, department=None, location_id=1):
         """
         Create a new employee record
@@ -107,6 +209,41 @@ class DatabaseManager:
             logger.info(f"✅ Employee created: {name} (ID: {employee.id}, Location: {location_id})")
             return employee.id
     
+    def create_employees_bulk(self, employees):
+        """
+        Create many employee records in a single transaction
+        
+        Args:
+            employees (list): Dictionaries with name, face_encoding and optional
+                email, department and location_id keys
+            
+        Returns:
+            int: Number of employees created
+        """
+        from datetime import datetime
+        
+        # One timestamp for the whole insert, rather than a Python default
+        # call per row
+        now = datetime.utcnow()
+        with self.get_session() as session:
+            for start in range(0, len(employees), BULK_INSERT_CHUNK_SIZE):
+                batch = [
+                    {
+                        'name': emp_data['name'],
+                        'email': emp_data.get('email'),
+                        'department': emp_data.get('department'),
+                        'location_id': emp_data.get('location_id', 1),
+                        'face_encoding': face_encoding_bytes(emp_data['face_encoding']),
+                        'is_active': True,
+                        'created_at': now,
+                        'updated_at': now
+                    }
+                    for emp_data in employees[start:start + BULK_INSERT_CHUNK_SIZE]
+                ]
+                session.execute(insert(Employee), batch)
+            logger.info(f"✅ Bulk created {len(employees)} employees")
+            return len(employees)
+    
     def get_employee_by_name(self, name):
         """
         Get employee by name
@@ -117,11 +254,12 @@ class DatabaseManager:
         Returns:
             dict: Dictionary with employee id and name, or None
         """
-        with self.get_session() as session:
-            emp = session.query(Employee).filter_by(name=name, is_active=True).first()
-            if emp:
-                return {'id': emp.id, 'name': emp.name}
-            return None
+        rows = self._read(
+            select(Employee.id, Employee.name)
+            .where(Employee.name == name, Employee.is_active == True)
+            .limit(1)
+        )
+        return dict(rows[0]) if rows else None
     
     def get_all_employees(self):
         """
@@ -130,19 +268,50 @@ class DatabaseManager:
         Returns:
             list: List of employee dictionaries with id, name, email, department, is_active, created_at
         """
-        with self.get_session() as session:
-            employees = session.query(Employee).filter_by(is_active=True).all()
-            return [
-                {
-                    'id': emp.id,
-                    'name': emp.name,
-                    'email': emp.email,
-                    'department': emp.department,
-                    'is_active': emp.is_active,
-                    'created_at': emp.created_at
-                }
-                for emp in employees
-            ]
+        rows = self._read(
+            select(
+                Employee.id,
+                Employee.name,
+                Employee.email,
+                Employee.department,
+                Employee.is_active,
+                Employee.created_at
+            ).where(Employee.is_active == True)
+        )
+        return [dict(row) for row in rows]
+    
+    def get_employee_count(self):
+        """
+        Count active employees without loading their rows
+        
+        Returns:
+            int: Number of active employees
+        """
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).select_from(Employee).where(Employee.is_active == True)
+            ).scalar_one()
+    
+    def get_all_employees_df(self):
+        """
+        Get all active employees as a DataFrame, for tabular consumers
+        
+        Returns:
+            pd.DataFrame: Columns id, name, email, department, is_active, created_at
+        """
+        import pandas as pd
+        
+        return pd.read_sql(
+            select(
+                Employee.id,
+                Employee.name,
+                Employee.email,
+                Employee.department,
+                Employee.is_active,
+                Employee.created_at
+            ).where(Employee.is_active == True),
+            self.engine
+        )
     
     def update_employee_name(self, old_name, new_name):
         """
@@ -191,6 +360,46 @@ class DatabaseManager:
             logger.info(f"✅ Time log created for employee {employee_id}")
             return time_log.id
     
+    def create_time_logs_bulk(self, time_logs):
+        """
+        Create many time log records in a single transaction
+        
+        Args:
+            time_logs (list): Dictionaries with employee_id and optional
+                clock_in, clock_out and date keys
+            
+        Returns:
+            int: Number of time logs created
+        """
+        from datetime import datetime
+        
+        today = datetime.now().date()
+        # One timestamp for the whole insert, rather than a Python default
+        # call per row
+        now = datetime.utcnow()
+        with self.get_session() as session:
+            for start in range(0, len(time_logs), BULK_INSERT_CHUNK_SIZE):
+                batch = []
+                for log_data in time_logs[start:start + BULK_INSERT_CHUNK_SIZE]:
+                    clock_in = log_data.get('clock_in')
+                    clock_out = log_data.get('clock_out')
+                    duration_hours = None
+                    if clock_in and clock_out:
+                        duration_hours = f"{(clock_out - clock_in).total_seconds() / 3600:.2f}"
+                    batch.append({
+                        'employee_id': log_data['employee_id'],
+                        'clock_in': clock_in,
+                        'clock_out': clock_out,
+                        'date': log_data.get('date') or today,
+                        'duration_hours': duration_hours,
+                        'status': TimeLog.status_for(clock_in, clock_out),
+                        'created_at': now,
+                        'updated_at': now
+                    })
+                session.execute(insert(TimeLog), batch)
+            logger.info(f"✅ Bulk created {len(time_logs)} time logs")
+            return len(time_logs)
+    
     def get_latest_time_log(self, employee_id, date=None):
         """
         Get the latest time log for an employee on a specific date as dictionary
@@ -202,17 +411,22 @@ class DatabaseManager:
         Returns:
             dict: Latest time log dictionary or None
         """
-        from datetime import datetime
-        from sqlalchemy import func
+        from datetime import datetime, timedelta
         
         if date is None:
             date = datetime.now().date()
+        elif isinstance(date, datetime):
+            date = date.date()
         
+        # Compare against the day's bounds rather than func.date(TimeLog.date)
+        # so ix_timelogs_emp_date_created can serve the lookup. Plain dates
+        # bind as 'YYYY-MM-DD', which sorts correctly against both the date-only
+        # and full datetime values stored in this column.
         with self.get_session() as session:
-            # Convert date to datetime for comparison, or use date() function
             log = session.query(TimeLog).filter(
                 TimeLog.employee_id == employee_id,
-                func.date(TimeLog.date) == date
+                TimeLog.date >= date,
+                TimeLog.date < date + timedelta(days=1)
             ).order_by(TimeLog.created_at.desc()).first()
             
             if log:
@@ -317,6 +531,39 @@ class DatabaseManager:
             logger.info(f"📝 System event logged: {event_type}")
             return system_log
     
+    def log_system_events_bulk(self, events):
+        """
+        Log many system events in a single transaction; use this rather than
+        log_system_event in loops
+        
+        Args:
+            events (list): Dictionaries with event_type and message and
+                optional employee_id and details keys
+            
+        Returns:
+            int: Number of events logged
+        """
+        from datetime import datetime
+        
+        # One timestamp for the whole insert, rather than a Python default
+        # call per row
+        now = datetime.utcnow()
+        with self.get_session() as session:
+            for start in range(0, len(events), BULK_INSERT_CHUNK_SIZE):
+                batch = [
+                    {
+                        'event_type': event_data['event_type'],
+                        'message': event_data['message'],
+                        'employee_id': event_data.get('employee_id'),
+                        'details': event_data.get('details') or None,
+                        'timestamp': now
+                    }
+                    for event_data in events[start:start + BULK_INSERT_CHUNK_SIZE]
+                ]
+                session.execute(insert(SystemLog), batch)
+            logger.info(f"✅ Bulk logged {len(events)} system events")
+            return len(events)
+    
     def get_time_logs_by_date_range(self, start_date, end_date):
         """
         Get time logs within a date range as dictionaries
@@ -329,7 +576,13 @@ class DatabaseManager:
             list: List of time log dictionaries
         """
         with self.get_session() as session:
-            logs = session.query(TimeLog).filter(
+            # Join the employee columns in up front instead of lazy-loading
+            # log.employee once per row
+            rows = session.query(
+                TimeLog,
+                Employee.name.label('employee_name'),
+                Employee.department.label('employee_department')
+            ).outerjoin(Employee, TimeLog.employee_id == Employee.id).filter(
                 TimeLog.date >= start_date,
                 TimeLog.date <= end_date
             ).all()
@@ -338,8 +591,8 @@ class DatabaseManager:
                 {
                     'id': log.id,
                     'employee_id': log.employee_id,
-                    'employee_name': log.employee.name if log.employee else 'Unknown',
-                    'employee_department': log.employee.department if log.employee else 'N/A',
+                    'employee_name': employee_name if employee_name is not None else 'Unknown',
+                    'employee_department': employee_department if employee_name is not None else 'N/A',
                     'clock_in': log.clock_in,
                     'clock_out': log.clock_out,
                     'date': log.date,
@@ -347,9 +600,48 @@ class DatabaseManager:
                     'status': log.status,
                     'created_at': log.created_at
                 }
-                for log in logs
+                for log, employee_name, employee_department in rows
             ]
     
+    def get_time_logs_df_by_date_range(self, start_date, end_date):
+        """
+        Get time logs within a date range as a DataFrame
+        
+        Same columns as get_time_logs_by_date_range, read in a single joined
+        query without building ORM objects.
+        
+        Args:
+            start_date (datetime): Start date
+            end_date (datetime): End date
+            
+        Returns:
+            pd.DataFrame: Time logs with employee name and department
+        """
+        import pandas as pd
+        
+        df = pd.read_sql(
+            select(
+                TimeLog.id,
+                TimeLog.employee_id,
+                Employee.name.label('employee_name'),
+                Employee.department.label('employee_department'),
+                TimeLog.clock_in,
+                TimeLog.clock_out,
+                TimeLog.date,
+                TimeLog.duration_hours,
+                TimeLog.status,
+                TimeLog.created_at
+            ).outerjoin(Employee, TimeLog.employee_id == Employee.id).where(
+                TimeLog.date >= start_date,
+                TimeLog.date <= end_date
+            ),
+            self.engine
+        )
+        missing_employee = df['employee_name'].isna()
+        df.loc[missing_employee, 'employee_name'] = 'Unknown'
+        df.loc[missing_employee, 'employee_department'] = 'N/A'
+        return df
+    
     def get_employee_stats(self, employee_id, start_date=None, end_date=None):
         """
         Get statistics for an employee
@@ -363,18 +655,21 @@ class DatabaseManager:
             dict: Employee statistics
         """
         with self.get_session() as session:
-            query = session.query(TimeLog).filter(TimeLog.employee_id == employee_id)
+            # Aggregate in the database rather than loading every log row
+            query = session.query(
+                func.count(TimeLog.id),
+                func.sum(case((TimeLog.status == 'completed', 1), else_=0)),
+                func.coalesce(func.sum(cast(func.nullif(TimeLog.duration_hours, ''), Float)), 0)
+            ).filter(TimeLog.employee_id == employee_id)
             
             if start_date:
                 query = query.filter(TimeLog.date >= start_date)
             if end_date:
                 query = query.filter(TimeLog.date <= end_date)
             
-            logs = query.all()
-            
-            total_days = len(logs)
-            completed_days = len([log for log in logs if log.status == 'completed'])
-            total_hours = sum([float(log.duration_hours) for log in logs if log.duration_hours])
+            total_days, completed_days, total_hours = query.one()
+            completed_days = completed_days or 0
+            total_hours = float(total_hours)
             
             return {
                 'total_days': total_days,
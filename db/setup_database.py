@@ -7,12 +7,16 @@ Initializes the database with tables and sample data
 import os
 import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 import logging
 
 # Add the project root to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import select
+
 from db.connection import get_database_manager
+from models.database import Employee, TimeLog
 from config.config import get_config
 
 # Configure logging
@@ -22,6 +26,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Directories already created by this process; repeat setups skip the syscalls
+_known_dirs = set()
+
 def setup_database(config_env='default'):
     """
     Set up the database with tables and initial data
@@ -39,9 +46,10 @@ def setup_database(config_env='default'):
         
         # Create necessary directories
         config = get_config(config_env)
-        os.makedirs(os.path.dirname(config.FACE_ENCODINGS_PATH), exist_ok=True)
-        os.makedirs(config.EMPLOYEE_PHOTOS_PATH, exist_ok=True)
-        os.makedirs(config.LOGS_PATH, exist_ok=True)
+        dirs = {os.path.dirname(config.FACE_ENCODINGS_PATH), config.EMPLOYEE_PHOTOS_PATH, config.LOGS_PATH}
+        for d in dirs - _known_dirs:
+            Path(d).mkdir(parents=True, exist_ok=True)
+        _known_dirs.update(dirs)
         
         logger.info("✅ Required directories created successfully!")
         
@@ -88,66 +96,93 @@ def create_sample_data(config_env='default'):
             {
                 'name': 'John Doe',
                 'email': 'john.doe@nsight.com',
-                'department': 'Engineering',
-                'face_encoding': np.array([0.1] * 128)  # Mock face encoding as numpy array
+                'department': 'Engineering'
             },
             {
                 'name': 'Jane Smith',
                 'email': 'jane.smith@nsight.com',
-                'department': 'Data Science',
-                'face_encoding': np.array([0.2] * 128)  # Mock face encoding as numpy array
+                'department': 'Data Science'
             },
             {
                 'name': 'Mike Johnson',
                 'email': 'mike.johnson@nsight.com',
-                'department': 'Product Management',
-                'face_encoding': np.array([0.3] * 128)  # Mock face encoding as numpy array
+                'department': 'Product Management'
             }
         ]
         
-        # Create sample employees and get their IDs
-        created_employee_ids = []
-        for emp_data in sample_employees:
-            # Check if employee already exists
-            existing_employee = db_manager.get_employee_by_name(emp_data['name'])
-            if not existing_employee:
-                employee_id = db_manager.create_employee(
+        # Mock face encodings (0.1, 0.2, 0.3, ...) built as one float32 matrix;
+        # each employee gets a row view
+        values = np.arange(1, len(sample_employees) + 1, dtype=np.float32) * np.float32(0.1)
+        encodings = np.full((len(sample_employees), 128), values[:, None], dtype=np.float32)
+        for emp_data, encoding in zip(sample_employees, encodings):
+            emp_data['face_encoding'] = encoding
+        
+        # One transaction: a set-based existence check and one batched
+        # INSERT per table instead of a lookup + insert per row
+        with db_manager.get_session() as session:
+            names = [emp_data['name'] for emp_data in sample_employees]
+            employee_ids = dict(session.execute(
+                select(Employee.name, Employee.id).where(Employee.name.in_(names))
+            ).all())
+            for name in employee_ids:
+                logger.info(f"👤 Employee already exists: {name}")
+            
+            new_employees = []
+            for emp_data in sample_employees:
+                if emp_data['name'] in employee_ids:
+                    continue
+                employee = Employee(
                     name=emp_data['name'],
-                    face_encoding=emp_data['face_encoding'],
                     email=emp_data['email'],
                     department=emp_data['department']
                 )
-                created_employee_ids.append({'id': employee_id, 'name': emp_data['name']})
-                logger.info(f"✅ Created sample employee: {emp_data['name']}")
-            else:
-                created_employee_ids.append({'id': existing_employee['id'], 'name': emp_data['name']})
-                logger.info(f"👤 Employee already exists: {emp_data['name']}")
-        
-        # Create sample time logs
-        now = datetime.now()
-        for i, emp_info in enumerate(created_employee_ids):
+                employee.set_face_encoding(emp_data['face_encoding'])
+                new_employees.append(employee)
+            
+            # The flush sends all rows as one multi-row INSERT ... RETURNING
+            session.add_all(new_employees)
+            session.flush()
+            for employee in new_employees:
+                employee_ids[employee.name] = employee.id
+                logger.info(f"✅ Created sample employee: {employee.name}")
+            
             # Create time logs for the last 3 days
-            for days_back in range(3):
-                date = now - timedelta(days=days_back)
-                
-                # Create clock-in entry
-                clock_in_time = date.replace(hour=9, minute=0, second=0, microsecond=0)
-                clock_out_time = date.replace(hour=17, minute=30, second=0, microsecond=0)
-                
-                # Add some variation to the times
-                clock_in_time += timedelta(minutes=i * 10)
-                clock_out_time += timedelta(minutes=i * 15)
-                
-                # Check if time log already exists
-                existing_log = db_manager.get_latest_time_log(emp_info['id'], date.date())
-                if not existing_log:
-                    time_log = db_manager.create_time_log(
-                        employee_id=emp_info['id'],
-                        clock_in=clock_in_time,
-                        clock_out=clock_out_time,
-                        date=date.date()
+            now = datetime.now()
+            days = [(now - timedelta(days=days_back)).date() for days_back in range(3)]
+            
+            # Stored dates mix 'YYYY-MM-DD' and full timestamps, so fetch the
+            # whole window and compare on the date part
+            existing_logs = {
+                (employee_id, log_date.date())
+                for employee_id, log_date in session.execute(
+                    select(TimeLog.employee_id, TimeLog.date).where(
+                        TimeLog.employee_id.in_(employee_ids.values()),
+                        TimeLog.date >= min(days),
+                        TimeLog.date < max(days) + timedelta(days=1)
+                    )
+                )
+            }
+            
+            new_time_logs = []
+            for i, emp_data in enumerate(sample_employees):
+                employee_id = employee_ids[emp_data['name']]
+                for day in days:
+                    if (employee_id, day) in existing_logs:
+                        continue
+                    
+                    # Add some variation to the times
+                    day_start = datetime.combine(day, datetime.min.time())
+                    time_log = TimeLog(
+                        employee_id=employee_id,
+                        clock_in=day_start + timedelta(hours=9, minutes=i * 10),
+                        clock_out=day_start + timedelta(hours=17, minutes=30 + i * 15),
+                        date=day
                     )
-                    logger.info(f"✅ Created time log for {emp_info['name']} on {date.date()}")
+                    time_log.update_status()
+                    new_time_logs.append(time_log)
+                    logger.info(f"✅ Created time log for {emp_data['name']} on {day}")
+            
+            session.add_all(new_time_logs)
         
         logger.info("🎉 Sample data created successfully!")
         
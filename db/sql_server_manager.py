@@ -4,17 +4,178 @@ Handles SQL Server connections and data synchronization
 """
 
 import pyodbc
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
 import logging
+import threading
 from datetime import datetime
 import json
+import numpy as np
+
+from models.database import face_encoding_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SQL Server schema for synced data, sent as one batch. Kept as explicit DDL
+# rather than Base.metadata.create_all: the SQL Server copy intentionally uses
+# NVARCHAR text, DATE days, binary face encodings and server-side defaults.
+# Time log upserts match on employee_id + date, so that key gets an index
+# (employees.name is covered by its UNIQUE constraint), which also serves
+# employee_id lookups; system_logs gets a filtered one for those. The time
+# log index is not unique: an employee can clock in more than once a day,
+# and the re-sync copies every SQLite row. Deployments that got the earlier
+# unique version have it replaced.
+SCHEMA_DDL = text("""
+    IF OBJECT_ID('employees', 'U') IS NULL
+    CREATE TABLE employees (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        name NVARCHAR(100) NOT NULL UNIQUE,
+        email NVARCHAR(100) UNIQUE,
+        department NVARCHAR(50),
+        face_encoding VARBINARY(512) NOT NULL,
+        is_active BIT DEFAULT 1,
+        created_at DATETIME2 DEFAULT GETDATE(),
+        updated_at DATETIME2 DEFAULT GETDATE()
+    );
+    
+    IF OBJECT_ID('time_logs', 'U') IS NULL
+    CREATE TABLE time_logs (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        employee_id INT NOT NULL,
+        clock_in DATETIME2,
+        clock_out DATETIME2,
+        date DATE NOT NULL,
+        duration_hours NVARCHAR(10),
+        status NVARCHAR(20) DEFAULT 'active',
+        notes NVARCHAR(MAX),
+        created_at DATETIME2 DEFAULT GETDATE(),
+        updated_at DATETIME2 DEFAULT GETDATE(),
+        FOREIGN KEY (employee_id) REFERENCES employees(id)
+    );
+    
+    IF EXISTS (SELECT * FROM sys.indexes WHERE name='IX_time_logs_emp_date' AND is_unique = 1)
+    DROP INDEX IX_time_logs_emp_date ON time_logs;
+    
+    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='IX_time_logs_emp_date')
+    CREATE INDEX IX_time_logs_emp_date ON time_logs(employee_id, date);
+    
+    IF OBJECT_ID('system_logs', 'U') IS NULL
+    CREATE TABLE system_logs (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        event_type NVARCHAR(50) NOT NULL,
+        employee_id INT,
+        message NVARCHAR(MAX) NOT NULL,
+        details NVARCHAR(MAX),
+        timestamp DATETIME2 DEFAULT GETDATE(),
+        FOREIGN KEY (employee_id) REFERENCES employees(id)
+    );
+    
+    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='IX_system_logs_employee')
+    CREATE INDEX IX_system_logs_employee ON system_logs(employee_id) WHERE employee_id IS NOT NULL;
+""")
+
+# Statements are text() constants so SQLAlchemy parses each only once.
+# Upserts keyed on the natural keys the single-row sync methods check
+EMPLOYEES_MERGE = text("""
+    MERGE employees AS T
+    USING (VALUES (:name, :email, :department, :face_encoding, :is_active, :created_at, :updated_at))
+        AS S (name, email, department, face_encoding, is_active, created_at, updated_at)
+    ON T.name = S.name
+    WHEN MATCHED THEN
+        UPDATE SET email = S.email, department = S.department, face_encoding = S.face_encoding,
+                   is_active = S.is_active, updated_at = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (name, email, department, face_encoding, is_active, created_at, updated_at)
+        VALUES (S.name, S.email, S.department, S.face_encoding, S.is_active, S.created_at, S.updated_at);
+""")
+
+TIME_LOGS_MERGE = text("""
+    MERGE time_logs AS T
+    USING (VALUES (:employee_id, :clock_in, :clock_out, :date, :duration_hours, :status, :notes, :created_at, :updated_at))
+        AS S (employee_id, clock_in, clock_out, date, duration_hours, status, notes, created_at, updated_at)
+    ON T.employee_id = S.employee_id AND T.date = S.date
+    WHEN MATCHED THEN
+        UPDATE SET clock_in = S.clock_in, clock_out = S.clock_out, duration_hours = S.duration_hours,
+                   status = S.status, notes = S.notes, updated_at = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (employee_id, clock_in, clock_out, date, duration_hours, status, notes, created_at, updated_at)
+        VALUES (S.employee_id, S.clock_in, S.clock_out, S.date, S.duration_hours, S.status, S.notes, S.created_at, S.updated_at);
+""")
+
+SYSTEM_LOGS_INSERT = text("""
+    INSERT INTO system_logs (event_type, employee_id, message, details, timestamp)
+    VALUES (:event_type, :employee_id, :message, :details, :timestamp)
+""")
+
+# employees.face_encoding is VARBINARY float32 bytes in tables created by
+# SCHEMA_DDL, but NVARCHAR JSON text in tables created before that (and by
+# sql_server_integration.py). Writers look the type up and encode to match
+FACE_ENCODING_TYPE_SQL = """
+    SELECT DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_NAME = 'employees' AND COLUMN_NAME = 'face_encoding'
+"""
+
+PING = text("SELECT 1")
+
+TABLE_COUNTS = text("""
+    SELECT (SELECT COUNT(*) FROM employees),
+           (SELECT COUNT(*) FROM time_logs),
+           (SELECT COUNT(*) FROM system_logs)
+""")
+
+def encode_face_encoding(encoding, column_type='varbinary'):
+    """
+    Pack a face encoding for SQL Server's face_encoding column: float32 bytes
+    for VARBINARY (128 values -> 512 bytes, vs ~4 KB as NVARCHAR JSON), or
+    JSON text for the NVARCHAR column of older tables
+    
+    Args:
+        encoding: float32 bytes (as stored in SQLite), legacy JSON string,
+            list or numpy array
+        column_type (str): The column's DATA_TYPE (see FACE_ENCODING_TYPE_SQL)
+        
+    Returns:
+        bytes or str: Encoding in the column's representation, or None
+    """
+    if encoding is None:
+        return None
+    if column_type != 'varbinary' and isinstance(encoding, str):
+        return encoding
+    if isinstance(encoding, (bytes, bytearray, memoryview)):
+        raw = bytes(encoding)
+    else:
+        if isinstance(encoding, str):
+            encoding = json.loads(encoding)
+        raw = np.asarray(encoding, dtype=np.float32).tobytes()
+    if column_type == 'varbinary':
+        return raw
+    return face_encoding_json(raw)
+
+def decode_face_encoding(raw):
+    """
+    Unpack a face encoding read back from SQL Server
+    
+    Args:
+        raw (bytes): VARBINARY face_encoding value
+        
+    Returns:
+        numpy.ndarray: Face encoding as a float32 array
+    """
+    return np.frombuffer(raw, dtype=np.float32)
+
+# One manager (and so one connection pool) per connection string
+_managers = {}
+_managers_lock = threading.Lock()
+
+def _enable_fast_executemany(conn, cursor, statement, parameters, context, executemany):
+    """Let pyodbc send executemany batches as one parameter array"""
+    if executemany:
+        cursor.fast_executemany = True
+
 class SQLServerManager:
     """
     SQL Server database manager for STES system
@@ -31,17 +192,41 @@ class SQLServerManager:
         self.connection_string = connection_string
         self.engine = None
         self.session_maker = None
+        self.face_encoding_type = None
         self._initialize_database()
     
+    @classmethod
+    def get(cls, connection_string):
+        """
+        Get the shared manager for a connection string, creating it on first use
+        
+        Args:
+            connection_string (str): SQL Server connection string
+            
+        Returns:
+            SQLServerManager: Cached manager whose pooled connections are reused
+        """
+        with _managers_lock:
+            manager = _managers.get(connection_string)
+            if manager is None:
+                manager = cls(connection_string)
+                _managers[connection_string] = manager
+            return manager
+    
     def _initialize_database(self):
         """Initialize SQL Server connection"""
         try:
             self.engine = create_engine(
                 self.connection_string,
                 echo=False,
+                poolclass=QueuePool,
+                pool_size=5,
+                max_overflow=10,
                 pool_pre_ping=True,
                 pool_recycle=3600
             )
+            if self.engine.dialect.driver == 'pyodbc':
+                event.listen(self.engine, "before_cursor_execute", _enable_fast_executemany)
             self.session_maker = sessionmaker(bind=self.engine)
             logger.info("✅ SQL Server connection established")
         except Exception as e:
@@ -66,7 +251,7 @@ class SQLServerManager:
         """Test SQL Server connection"""
         try:
             with self.get_session() as session:
-                result = session.execute(text("SELECT 1"))
+                result = session.execute(PING)
                 logger.info("✅ SQL Server connection test successful")
                 return True
         except Exception as e:
@@ -77,54 +262,12 @@ class SQLServerManager:
         """Create tables in SQL Server if they don't exist"""
         try:
             with self.get_session() as session:
-                # Create employees table
-                session.execute(text("""
-                    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='employees' AND xtype='U')
-                    CREATE TABLE employees (
-                        id INT IDENTITY(1,1) PRIMARY KEY,
-                        name NVARCHAR(100) NOT NULL UNIQUE,
-                        email NVARCHAR(100) UNIQUE,
-                        department NVARCHAR(50),
-                        face_encoding NVARCHAR(MAX) NOT NULL,
-                        is_active BIT DEFAULT 1,
-                        created_at DATETIME2 DEFAULT GETDATE(),
-                        updated_at DATETIME2 DEFAULT GETDATE()
-                    )
-                """))
-                
-                # Create time_logs table
-                session.execute(text("""
-                    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='time_logs' AND xtype='U')
-                    CREATE TABLE time_logs (
-                        id INT IDENTITY(1,1) PRIMARY KEY,
-                        employee_id INT NOT NULL,
-                        clock_in DATETIME2,
-                        clock_out DATETIME2,
-                        date DATE NOT NULL,
-                        duration_hours NVARCHAR(10),
-                        status NVARCHAR(20) DEFAULT 'active',
-                        notes NVARCHAR(MAX),
-                        created_at DATETIME2 DEFAULT GETDATE(),
-                        updated_at DATETIME2 DEFAULT GETDATE(),
-                        FOREIGN KEY (employee_id) REFERENCES employees(id)
-                    )
-                """))
+                # All three tables and the sync index in one round trip
+                session.execute(SCHEMA_DDL)
                 
-                # Create system_logs table
-                session.execute(text("""
-                    IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='system_logs' AND xtype='U')
-                    CREATE TABLE system_logs (
-                        id INT IDENTITY(1,1) PRIMARY KEY,
-                        event_type NVARCHAR(50) NOT NULL,
-                        employee_id INT,
-                        message NVARCHAR(MAX) NOT NULL,
-                        details NVARCHAR(MAX),
-                        timestamp DATETIME2 DEFAULT GETDATE(),
-                        FOREIGN KEY (employee_id) REFERENCES employees(id)
-                    )
-                """))
+                # Look the face_encoding type up again for the tables as they are now
+                self.face_encoding_type = None
                 
-                session.commit()
                 logger.info("✅ SQL Server tables created successfully")
                 return True
                 
@@ -132,6 +275,61 @@ class SQLServerManager:
             logger.error(f"❌ Failed to create SQL Server tables: {e}")
             return False
     
+    def get_face_encoding_type(self):
+        """
+        Data type of the employees.face_encoding column, looked up once
+        
+        Returns:
+            str: 'varbinary' for tables created by create_tables, or the
+                older tables' type (e.g. 'nvarchar')
+        """
+        if self.face_encoding_type is None:
+            with self.engine.connect() as conn:
+                column_type = conn.exec_driver_sql(FACE_ENCODING_TYPE_SQL).scalar()
+            if column_type is None:
+                # No table yet; create_tables will make a VARBINARY one
+                return 'varbinary'
+            self.face_encoding_type = column_type.lower()
+        return self.face_encoding_type
+    
+    def _employee_params(self, employee_data):
+        """Bound parameters for EMPLOYEES_MERGE from a SQLite employee dict"""
+        return {
+            'name': employee_data['name'],
+            'email': employee_data['email'],
+            'department': employee_data['department'],
+            'face_encoding': encode_face_encoding(employee_data['face_encoding'], self.get_face_encoding_type()),
+            'is_active': employee_data['is_active'],
+            'created_at': employee_data['created_at'],
+            'updated_at': employee_data['updated_at']
+        }
+    
+    @staticmethod
+    def _time_log_params(time_log_data):
+        """Bound parameters for TIME_LOGS_MERGE from a SQLite time log dict"""
+        return {
+            'employee_id': time_log_data['employee_id'],
+            'clock_in': time_log_data['clock_in'],
+            'clock_out': time_log_data['clock_out'],
+            'date': time_log_data['date'],
+            'duration_hours': time_log_data['duration_hours'],
+            'status': time_log_data['status'],
+            'notes': time_log_data.get('notes'),
+            'created_at': time_log_data['created_at'],
+            'updated_at': time_log_data['updated_at']
+        }
+    
+    @staticmethod
+    def _system_log_params(system_log_data):
+        """Bound parameters for SYSTEM_LOGS_INSERT from a SQLite system log dict"""
+        return {
+            'event_type': system_log_data['event_type'],
+            'employee_id': system_log_data.get('employee_id'),
+            'message': system_log_data['message'],
+            'details': json.dumps(system_log_data.get('details', {})) if system_log_data.get('details') else None,
+            'timestamp': system_log_data['timestamp']
+        }
+    
     def sync_employee(self, employee_data):
         """
         Sync a single employee to SQL Server
@@ -141,45 +339,10 @@ class SQLServerManager:
         """
         try:
             with self.get_session() as session:
-                # Check if employee exists
-                existing = session.execute(
-                    text("SELECT id FROM employees WHERE name = :name"),
-                    {"name": employee_data['name']}
-                ).fetchone()
-                
-                if not existing:
-                    # Insert new employee
-                    session.execute(text("""
-                        INSERT INTO employees (name, email, department, face_encoding, is_active, created_at, updated_at)
-                        VALUES (:name, :email, :department, :face_encoding, :is_active, :created_at, :updated_at)
-                    """), {
-                        'name': employee_data['name'],
-                        'email': employee_data['email'],
-                        'department': employee_data['department'],
-                        'face_encoding': employee_data['face_encoding'],
-                        'is_active': employee_data['is_active'],
-                        'created_at': employee_data['created_at'],
-                        'updated_at': employee_data['updated_at']
-                    })
-                    logger.info(f"✅ Synced employee: {employee_data['name']}")
-                else:
-                    # Update existing employee
-                    session.execute(text("""
-                        UPDATE employees 
-                        SET email = :email, department = :department, face_encoding = :face_encoding, 
-                            is_active = :is_active, updated_at = :updated_at
-                        WHERE name = :name
-                    """), {
-                        'name': employee_data['name'],
-                        'email': employee_data['email'],
-                        'department': employee_data['department'],
-                        'face_encoding': employee_data['face_encoding'],
-                        'is_active': employee_data['is_active'],
-                        'updated_at': datetime.now()
-                    })
-                    logger.info(f"✅ Updated employee: {employee_data['name']}")
+                # Insert or update in one atomic statement
+                session.execute(EMPLOYEES_MERGE, self._employee_params(employee_data))
                 
-                session.commit()
+                logger.info(f"✅ Synced employee: {employee_data['name']}")
                 return True
                 
         except Exception as e:
@@ -195,55 +358,10 @@ class SQLServerManager:
         """
         try:
             with self.get_session() as session:
-                # Check if time log exists
-                existing = session.execute(
-                    text("""
-                        SELECT id FROM time_logs 
-                        WHERE employee_id = :employee_id AND date = :date
-                    """),
-                    {
-                        'employee_id': time_log_data['employee_id'],
-                        'date': time_log_data['date']
-                    }
-                ).fetchone()
-                
-                if not existing:
-                    # Insert new time log
-                    session.execute(text("""
-                        INSERT INTO time_logs (employee_id, clock_in, clock_out, date, duration_hours, status, notes, created_at, updated_at)
-                        VALUES (:employee_id, :clock_in, :clock_out, :date, :duration_hours, :status, :notes, :created_at, :updated_at)
-                    """), {
-                        'employee_id': time_log_data['employee_id'],
-                        'clock_in': time_log_data['clock_in'],
-                        'clock_out': time_log_data['clock_out'],
-                        'date': time_log_data['date'],
-                        'duration_hours': time_log_data['duration_hours'],
-                        'status': time_log_data['status'],
-                        'notes': time_log_data.get('notes'),
-                        'created_at': time_log_data['created_at'],
-                        'updated_at': time_log_data['updated_at']
-                    })
-                    logger.info(f"✅ Synced time log: {time_log_data['id']}")
-                else:
-                    # Update existing time log
-                    session.execute(text("""
-                        UPDATE time_logs 
-                        SET clock_in = :clock_in, clock_out = :clock_out, duration_hours = :duration_hours,
-                            status = :status, notes = :notes, updated_at = :updated_at
-                        WHERE employee_id = :employee_id AND date = :date
-                    """), {
-                        'employee_id': time_log_data['employee_id'],
-                        'clock_in': time_log_data['clock_in'],
-                        'clock_out': time_log_data['clock_out'],
-                        'date': time_log_data['date'],
-                        'duration_hours': time_log_data['duration_hours'],
-                        'status': time_log_data['status'],
-                        'notes': time_log_data.get('notes'),
-                        'updated_at': datetime.now()
-                    })
-                    logger.info(f"✅ Updated time log: {time_log_data['id']}")
+                # Insert or update in one atomic statement
+                session.execute(TIME_LOGS_MERGE, self._time_log_params(time_log_data))
                 
-                session.commit()
+                logger.info(f"✅ Synced time log: {time_log_data['id']}")
                 return True
                 
         except Exception as e:
@@ -258,20 +376,12 @@ class SQLServerManager:
             system_log_data (dict): System log data from SQLite
         """
         try:
+            # Serialize details before the transaction opens
+            params = self._system_log_params(system_log_data)
             with self.get_session() as session:
                 # Insert system log (no updates needed for logs)
-                session.execute(text("""
-                    INSERT INTO system_logs (event_type, employee_id, message, details, timestamp)
-                    VALUES (:event_type, :employee_id, :message, :details, :timestamp)
-                """), {
-                    'event_type': system_log_data['event_type'],
-                    'employee_id': system_log_data.get('employee_id'),
-                    'message': system_log_data['message'],
-                    'details': json.dumps(system_log_data.get('details', {})) if system_log_data.get('details') else None,
-                    'timestamp': system_log_data['timestamp']
-                })
+                session.execute(SYSTEM_LOGS_INSERT, params)
                 
-                session.commit()
                 logger.info(f"✅ Synced system log: {system_log_data['event_type']}")
                 return True
                 
@@ -279,14 +389,112 @@ class SQLServerManager:
             logger.error(f"❌ Failed to sync system log: {e}")
             return False
     
+    def sync_employees_bulk(self, employees):
+        """
+        Upsert many employees to SQL Server in one batched MERGE
+        
+        Args:
+            employees (list): Employee data dictionaries from SQLite
+            
+        Returns:
+            bool: True if sync successful
+        """
+        if not employees:
+            return True
+        try:
+            rows = [self._employee_params(emp) for emp in employees]
+            with self.get_session() as session:
+                session.execute(EMPLOYEES_MERGE, rows)
+            logger.info(f"✅ Synced {len(rows)} employees")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to bulk sync employees: {e}")
+            return False
+    
+    def sync_time_logs_bulk(self, time_logs):
+        """
+        Upsert many time logs to SQL Server in one batched MERGE
+        
+        Args:
+            time_logs (list): Time log data dictionaries from SQLite
+            
+        Returns:
+            bool: True if sync successful
+        """
+        if not time_logs:
+            return True
+        try:
+            rows = [self._time_log_params(log) for log in time_logs]
+            with self.get_session() as session:
+                session.execute(TIME_LOGS_MERGE, rows)
+            logger.info(f"✅ Synced {len(rows)} time logs")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to bulk sync time logs: {e}")
+            return False
+    
+    def sync_system_logs_bulk(self, system_logs):
+        """
+        Insert many system logs to SQL Server in one batched INSERT
+        
+        Args:
+            system_logs (list): System log data dictionaries from SQLite
+            
+        Returns:
+            bool: True if sync successful
+        """
+        if not system_logs:
+            return True
+        try:
+            rows = [self._system_log_params(log) for log in system_logs]
+            with self.get_session() as session:
+                session.execute(SYSTEM_LOGS_INSERT, rows)
+            logger.info(f"✅ Synced {len(rows)} system logs")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to bulk sync system logs: {e}")
+            return False
+    
+    def sync_batch(self, employees=(), time_logs=(), system_logs=()):
+        """
+        Sync employees, time logs and system logs in a single transaction
+        
+        Args:
+            employees (list): Employee data dictionaries from SQLite
+            time_logs (list): Time log data dictionaries from SQLite
+            system_logs (list): System log data dictionaries from SQLite
+            
+        Returns:
+            bool: True if sync successful
+        """
+        try:
+            # Build all parameters (face encoding packing, details JSON) before
+            # the transaction opens so it only spans the database calls
+            employee_rows = [self._employee_params(emp) for emp in employees]
+            time_log_rows = [self._time_log_params(log) for log in time_logs]
+            system_log_rows = [self._system_log_params(log) for log in system_logs]
+            
+            with self.get_session() as session:
+                # Employees first so new time/system logs can reference them
+                if employee_rows:
+                    session.execute(EMPLOYEES_MERGE, employee_rows)
+                if time_log_rows:
+                    session.execute(TIME_LOGS_MERGE, time_log_rows)
+                if system_log_rows:
+                    session.execute(SYSTEM_LOGS_INSERT, system_log_rows)
+            logger.info(f"✅ Synced {len(employees)} employees, {len(time_logs)} time logs "
+                        f"and {len(system_logs)} system logs")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to sync batch: {e}")
+            return False
+    
     def get_sync_status(self):
         """Get sync status and statistics"""
         try:
             with self.get_session() as session:
                 # Get counts from SQL Server
-                employee_count = session.execute(text("SELECT COUNT(*) FROM employees")).scalar()
-                time_log_count = session.execute(text("SELECT COUNT(*) FROM time_logs")).scalar()
-                system_log_count = session.execute(text("SELECT COUNT(*) FROM system_logs")).scalar()
+                employee_count, time_log_count, system_log_count = session.execute(TABLE_COUNTS).one()
                 
                 return {
                     'employees': employee_count,
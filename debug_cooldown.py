@@ -30,7 +30,7 @@ def debug_cooldown():
     
     # Clear cooldown and try again
     print("\n--- Clearing cooldown ---")
-    manager.recent_recognitions = {}
+    manager.recent_recognitions.clear()
     
     is_cooldown = manager.is_within_cooldown('Arnav Mehta')
     print(f"Is Arnav in cooldown after clearing? {is_cooldown}")
@@ -45,14 +45,12 @@ def debug_cooldown():
     else:
         print(f"Name is: {name}")
     
-    # Check cooldown in handle_face_recognition
-    if manager.is_within_cooldown(name):
+    # Check cooldown and status the way handle_face_recognition does
+    in_cooldown, employee_status = manager.check(name)
+    if in_cooldown:
         print(f"❌ {name} is in cooldown - would skip")
     else:
         print(f"✅ {name} is NOT in cooldown - would process")
-        
-        # Get employee status
-        employee_status = manager.get_employee_status(name)
         print(f"Employee status in handle_face_recognition: {employee_status}")
 
 if __name__ == "__main__":
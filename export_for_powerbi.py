@@ -5,60 +5,99 @@ Exports SQLite database tables to CSV files for Power BI import
 """
 
 import sqlite3
-import pandas as pd
+import csv
 import os
+import shutil
 from datetime import datetime
 
+# Rows fetched per round trip while streaming a table to CSV
+EXPORT_CHUNK_SIZE = 50_000
+
+# employees.face_encoding holds raw float32 bytes, which are no use in a
+# CSV or to Power BI, so it's left out of the exports
+EXCLUDED_COLUMNS = ('face_encoding',)
+
+def export_table(conn, table, path):
+    """
+    Stream a table to CSV without holding it all in memory
+    
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        table (str): Table name
+        path (str): Destination CSV path
+        
+    Returns:
+        int: Number of rows written
+    """
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")
+               if row[1] not in EXCLUDED_COLUMNS]
+    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table}")
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow([column[0] for column in cursor.description])
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+def link_latest(path, latest_path):
+    """
+    Point the un-timestamped "latest" file at a finished export
+    
+    Args:
+        path (str): Timestamped export file
+        latest_path (str): Latest-version file name to (re)create
+    """
+    # Link under a temporary name, then swap it in, so readers never see the
+    # latest file missing between the remove and the link
+    tmp_path = f'{latest_path}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(path, tmp_path)
+    except OSError:
+        # Hard links unsupported here (e.g. some network shares)
+        shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, latest_path)
+
 def export_for_powerbi():
     """Export STES database tables to CSV files for Power BI"""
     
     print("🚀 Starting STES Power BI Export...")
     
     try:
-        # Connect to SQLite database
-        conn = sqlite3.connect('stes.db')
+        # Connect to SQLite database read-only; mmap lets the full-table
+        # scans read pages straight from the page cache
+        conn = sqlite3.connect('file:stes.db?mode=ro', uri=True)
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("PRAGMA mmap_size=268435456")
         print("✅ Connected to stes.db")
         
-        # Export each table
-        print("📊 Exporting tables...")
-        
-        # Employees table
-        employees_df = pd.read_sql_query("SELECT * FROM employees", conn)
-        print(f"   - employees: {len(employees_df)} records")
-        
-        # Time logs table
-        time_logs_df = pd.read_sql_query("SELECT * FROM time_logs", conn)
-        print(f"   - time_logs: {len(time_logs_df)} records")
-        
-        # System logs table
-        system_logs_df = pd.read_sql_query("SELECT * FROM system_logs", conn)
-        print(f"   - system_logs: {len(system_logs_df)} records")
-        
         # Create exports directory
         export_dir = 'powerbi_exports'
         os.makedirs(export_dir, exist_ok=True)
         
-        # Export to CSV with timestamp
+        # Export each table to CSV with timestamp, streamed in chunks
+        print("📊 Exporting tables...")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        employees_file = f'{export_dir}/employees_{timestamp}.csv'
-        time_logs_file = f'{export_dir}/time_logs_{timestamp}.csv'
-        system_logs_file = f'{export_dir}/system_logs_{timestamp}.csv'
-        
-        employees_df.to_csv(employees_file, index=False)
-        time_logs_df.to_csv(time_logs_file, index=False)
-        system_logs_df.to_csv(system_logs_file, index=False)
-        
-        # Also create latest versions (without timestamp)
-        employees_df.to_csv(f'{export_dir}/employees.csv', index=False)
-        time_logs_df.to_csv(f'{export_dir}/time_logs.csv', index=False)
-        system_logs_df.to_csv(f'{export_dir}/system_logs.csv', index=False)
+        counts = {}
+        for table in ('employees', 'time_logs', 'system_logs'):
+            table_file = f'{export_dir}/{table}_{timestamp}.csv'
+            counts[table] = export_table(conn, table, table_file)
+            print(f"   - {table}: {counts[table]} records")
+            
+            # Also create latest version (without timestamp) from the same file
+            link_latest(table_file, f'{export_dir}/{table}.csv')
         
         print(f"\n✅ Export completed successfully!")
         print(f"📁 Files saved in: {export_dir}/")
-        print(f"   - employees.csv ({len(employees_df)} records)")
-        print(f"   - time_logs.csv ({len(time_logs_df)} records)")
-        print(f"   - system_logs.csv ({len(system_logs_df)} records)")
+        for table, count in counts.items():
+            print(f"   - {table}.csv ({count} records)")
         print(f"\n🎯 Next steps:")
         print(f"   1. Open Power BI Desktop")
         print(f"   2. Click 'Get Data' → 'Text/CSV'")
@@ -6,8 +6,79 @@ Fix Multi-Location Export with Unique Employee IDs
 import sqlite3
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
 
+# Parquet copies of the combined exports (compressed, typed, and much
+# faster for Power BI to load); CSV-only when pyarrow isn't installed
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Employee id column per table, and the column keeping its original value
+TABLES = {
+    'employees': ('id', 'original_id'),
+    'time_logs': ('employee_id', 'original_employee_id'),
+    'system_logs': ('employee_id', 'original_employee_id'),
+}
+
+# Each location's employee ids are shifted into their own range
+ID_OFFSET = 1000
+
+# employees.face_encoding holds raw float32 bytes, which are no use in a
+# CSV or to Power BI, so it's left out of the exports
+EXCLUDED_COLUMNS = ('face_encoding',)
+
+def read_all_locations(locations, table):
+    """
+    Read a table for every location in one UNION ALL query, with the unique
+    employee ids and location columns computed by SQLite
+    
+    Args:
+        locations (list): Location dicts with id, name and db_path
+        table (str): Table name
+    
+    Returns:
+        pd.DataFrame: All locations' rows, in location order
+    """
+    id_column, original_column = TABLES[table]
+    db_paths = list(dict.fromkeys(location['db_path'] for location in locations))
+    schemas = {db_path: f"loc{i}" for i, db_path in enumerate(db_paths)}
+    
+    with closing(sqlite3.connect(':memory:', uri=True)) as conn:
+        for db_path, schema in schemas.items():
+            # Read-only, so a missing database errors instead of being created
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (f"file:{db_path}?mode=ro",))
+        
+        columns = [row[1] for row in conn.execute(f"PRAGMA {schemas[db_paths[0]]}.table_info({table})")
+                   if row[1] not in EXCLUDED_COLUMNS]
+        selects = []
+        for location in locations:
+            location_id = f"{location['id']} AS location_id"
+            # NULL employee ids stay NULL through the add; employees already
+            # has a location_id column, which is replaced in place
+            select = [
+                f"{column} + {(location['id'] - 1) * ID_OFFSET} AS {column}" if column == id_column
+                else location_id if column == 'location_id'
+                else column
+                for column in columns
+            ]
+            select.append(f"{id_column} AS {original_column}")
+            if 'location_id' not in columns:
+                select.append(location_id)
+            select.append("? AS location_name")
+            selects.append(f"SELECT {', '.join(select)} FROM {schemas[location['db_path']]}.{table}")
+        
+        df = pd.read_sql_query(" UNION ALL ".join(selects), conn,
+                               params=[location['name'] for location in locations])
+    
+    # Nullable Int64 keeps ids integers even when some are missing
+    df[id_column] = df[id_column].astype('Int64')
+    return df
+
 def fix_multi_location_export():
     """Export data with unique employee IDs for each location"""
     print("🔧 Fixing multi-location export with unique employee IDs...")
@@ -19,89 +90,51 @@ def fix_multi_location_export():
         {"id": 3, "name": "West Coast Office", "db_path": "stes.db"}
     ]
     
-    all_employees = []
-    all_time_logs = []
-    all_system_logs = []
+    # One timestamp shared by every exported row
+    export_timestamp = datetime.now().isoformat()
+    
+    def export_table(table):
+        """Read a table for all locations and write its combined files"""
+        df = read_all_locations(locations, table)
+        if not df.empty:
+            df['export_timestamp'] = export_timestamp
+            df.to_csv(f'powerbi_exports/all_locations_{table}_fixed.csv', index=False)
+            if PYARROW_AVAILABLE:
+                df.to_parquet(f'powerbi_exports/all_locations_{table}_fixed.parquet',
+                              engine='pyarrow', compression='zstd', index=False)
+        return df
+    
+    # One query per table covers every location. Each table is read and
+    # written on its own thread, so one table's file writes overlap the
+    # other tables' SQLite reads
+    try:
+        with ThreadPoolExecutor(max_workers=len(TABLES)) as executor:
+            frames = dict(zip(TABLES, executor.map(export_table, TABLES)))
+    except Exception as e:
+        print(f"❌ Error exporting location data: {e}")
+        return
     
     for location in locations:
-        location_id = location["id"]
-        location_name = location["name"]
-        
-        print(f"\n🚀 Processing Location {location_id}: {location_name}")
-        
-        try:
-            # Connect to SQLite database
-            conn = sqlite3.connect(location["db_path"])
-            
-            # Export employees with unique IDs
-            employees_df = pd.read_sql_query("SELECT * FROM employees", conn)
-            if not employees_df.empty:
-                # Create unique employee IDs for this location
-                employees_df['original_id'] = employees_df['id']
-                employees_df['id'] = employees_df['id'] + (location_id - 1) * 1000  # Unique range per location
-                employees_df['location_id'] = location_id
-                employees_df['location_name'] = location_name
-                employees_df['export_timestamp'] = datetime.now().isoformat()
-                
-                all_employees.append(employees_df)
-                print(f"   ✅ employees: {len(employees_df)} records")
-            
-            # Export time logs with updated employee IDs
-            time_logs_df = pd.read_sql_query("SELECT * FROM time_logs", conn)
-            if not time_logs_df.empty:
-                # Update employee_id to match the new unique IDs
-                time_logs_df['original_employee_id'] = time_logs_df['employee_id']
-                time_logs_df['employee_id'] = time_logs_df['employee_id'] + (location_id - 1) * 1000
-                time_logs_df['location_id'] = location_id
-                time_logs_df['location_name'] = location_name
-                time_logs_df['export_timestamp'] = datetime.now().isoformat()
-                
-                all_time_logs.append(time_logs_df)
-                print(f"   ✅ time_logs: {len(time_logs_df)} records")
-            
-            # Export system logs with updated employee IDs
-            system_logs_df = pd.read_sql_query("SELECT * FROM system_logs", conn)
-            if not system_logs_df.empty:
-                # Update employee_id to match the new unique IDs (only for non-null values)
-                system_logs_df['original_employee_id'] = system_logs_df['employee_id']
-                system_logs_df['employee_id'] = system_logs_df['employee_id'].apply(
-                    lambda x: x + (location_id - 1) * 1000 if pd.notna(x) else x
-                )
-                system_logs_df['location_id'] = location_id
-                system_logs_df['location_name'] = location_name
-                system_logs_df['export_timestamp'] = datetime.now().isoformat()
-                
-                all_system_logs.append(system_logs_df)
-                print(f"   ✅ system_logs: {len(system_logs_df)} records")
-            
-            conn.close()
-            
-        except Exception as e:
-            print(f"❌ Error processing Location {location_id}: {e}")
-    
-    # Combine all data
-    if all_employees:
-        combined_employees = pd.concat(all_employees, ignore_index=True)
-        combined_employees.to_csv('powerbi_exports/all_locations_employees_fixed.csv', index=False)
-        print(f"\n✅ Combined employees: {len(combined_employees)} records")
-    
-    if all_time_logs:
-        combined_time_logs = pd.concat(all_time_logs, ignore_index=True)
-        combined_time_logs.to_csv('powerbi_exports/all_locations_time_logs_fixed.csv', index=False)
-        print(f"✅ Combined time_logs: {len(combined_time_logs)} records")
-    
-    if all_system_logs:
-        combined_system_logs = pd.concat(all_system_logs, ignore_index=True)
-        combined_system_logs.to_csv('powerbi_exports/all_locations_system_logs_fixed.csv', index=False)
-        print(f"✅ Combined system_logs: {len(combined_system_logs)} records")
+        print(f"\n🚀 Location {location['id']}: {location['name']}")
+        for table, df in frames.items():
+            count = (df['location_id'] == location['id']).sum()
+            if count:
+                print(f"   ✅ {table}: {count} records")
+    
+    print()
+    for table, df in frames.items():
+        if not df.empty:
+            print(f"✅ Combined {table}: {len(df)} records")
+    
+    employees_df = frames['employees']
     
     # Verify no duplicates
     print(f"\n🔍 Verifying unique employee IDs...")
-    print(f"Unique employee IDs: {combined_employees['id'].nunique()}")
-    print(f"Total employees: {len(combined_employees)}")
+    print(f"Unique employee IDs: {employees_df['id'].nunique()}")
+    print(f"Total employees: {len(employees_df)}")
     
-    duplicates = combined_employees['id'].value_counts()
-    duplicate_ids = duplicates[duplicates > 1]
+    id_counts = employees_df['id'].value_counts()
+    duplicate_ids = id_counts[id_counts > 1]
     
     if len(duplicate_ids) == 0:
         print("✅ No duplicate employee IDs found!")
@@ -112,14 +145,15 @@ def fix_multi_location_export():
     print(f"   - all_locations_employees_fixed.csv")
     print(f"   - all_locations_time_logs_fixed.csv")
     print(f"   - all_locations_system_logs_fixed.csv")
+    if PYARROW_AVAILABLE:
+        print(f"   - matching .parquet files (zstd)")
     
     print(f"\n📋 Employee ID ranges:")
+    employee_id_ranges = employees_df.groupby('location_id')['id'].agg(['min', 'max'])
     for location in locations:
-        location_employees = combined_employees[combined_employees['location_id'] == location['id']]
-        if not location_employees.empty:
-            min_id = location_employees['id'].min()
-            max_id = location_employees['id'].max()
+        if location['id'] in employee_id_ranges.index:
+            min_id, max_id = employee_id_ranges.loc[location['id']]
             print(f"   - {location['name']}: IDs {min_id} to {max_id}")
 
 if __name__ == "__main__":
-    fix_multi_location_export() 
\ No newline at end of file
+    fix_multi_location_export()
\ No newline at end of file
@@ -5,9 +5,55 @@ Ensures perfect synchronization between SQLite and SQL Server
 """
 
 import sqlite3
-import pyodbc
+import pandas as pd
 import json
 from datetime import datetime
+from urllib.parse import quote_plus
+from sqlalchemy import create_engine
+
+from db.sql_server_manager import FACE_ENCODING_TYPE_SQL, encode_face_encoding
+
+# Rows per executemany batch sent to SQL Server
+BATCH_SIZE = 10000
+
+# SQLite columns copied to each SQL Server table
+SYNC_COLUMNS = {
+    'employees': ['id', 'name', 'email', 'department', 'face_encoding', 'is_active',
+                  'created_at', 'updated_at'],
+    'time_logs': ['id', 'employee_id', 'clock_in', 'clock_out', 'date', 'duration_hours',
+                  'status', 'notes', 'created_at', 'updated_at'],
+    'system_logs': ['id', 'event_type', 'employee_id', 'message', 'details', 'timestamp'],
+}
+
+def copy_table(sqlite_conn, sql_server_conn, table, location):
+    """
+    Stream a SQLite table into SQL Server one batch at a time, inside the
+    caller's transaction
+    
+    Args:
+        sqlite_conn (sqlite3.Connection): Source database connection
+        sql_server_conn: SQLAlchemy connection to SQL Server
+        table (str): Table name
+        location (dict): stes_location_id, stes_location_name and
+            sync_timestamp values added to every row
+        
+    Returns:
+        int: Number of rows copied
+    """
+    query = f"SELECT {', '.join(SYNC_COLUMNS[table])} FROM {table} ORDER BY id"
+    count = 0
+    if 'face_encoding' in SYNC_COLUMNS[table]:
+        # Encode to match the SQL Server column: VARBINARY bytes, or JSON
+        # text in older NVARCHAR tables
+        column_type = (sql_server_conn.exec_driver_sql(FACE_ENCODING_TYPE_SQL).scalar() or 'varbinary').lower()
+    for chunk in pd.read_sql_query(query, sqlite_conn, chunksize=BATCH_SIZE):
+        if 'face_encoding' in chunk:
+            chunk['face_encoding'] = [encode_face_encoding(encoding, column_type)
+                                      for encoding in chunk['face_encoding']]
+        chunk.assign(**location).to_sql(table, sql_server_conn, if_exists='append',
+                                        index=False, chunksize=BATCH_SIZE)
+        count += len(chunk)
+    return count
 
 def fix_sql_server_data():
     """Fix any data issues in SQL Server"""
@@ -29,140 +75,118 @@ def fix_sql_server_data():
     )
     
     try:
-        # Connect to SQL Server
-        sql_server_conn = pyodbc.connect(conn_str)
-        sql_server_cursor = sql_server_conn.cursor()
+        # fast_executemany sends each to_sql batch as one parameter array
+        sql_server_engine = create_engine(
+            "mssql+pyodbc:///?odbc_connect=" + quote_plus(conn_str),
+            fast_executemany=True
+        )
         
         # Connect to SQLite
         sqlite_conn = sqlite3.connect('stes.db')
         sqlite_cursor = sqlite_conn.cursor()
         
-        print("✅ Connected to both databases")
-        
-        # Step 1: Clear all data from SQL Server
-        print("\n🧹 Clearing SQL Server data...")
-        sql_server_cursor.execute("DELETE FROM system_logs")
-        sql_server_cursor.execute("DELETE FROM time_logs")
-        sql_server_cursor.execute("DELETE FROM employees")
-        sql_server_conn.commit()
-        print("✅ Cleared all data from SQL Server")
-        
-        # Step 2: Re-sync employees
-        print("\n👥 Re-syncing employees...")
-        sqlite_cursor.execute("SELECT * FROM employees ORDER BY id")
-        employees = sqlite_cursor.fetchall()
-        
-        for employee in employees:
-            sql_server_cursor.execute("""
-                INSERT INTO employees (
-                    id, name, email, department, face_encoding, is_active,
-                    created_at, updated_at, stes_location_id, stes_location_name, sync_timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                employee[0], employee[1], employee[2], employee[3], employee[4], employee[5],
-                employee[6], employee[7], config['stes_location_id'], config['stes_location_name'], datetime.now()
-            ))
-        
-        sql_server_conn.commit()
-        print(f"✅ Re-synced {len(employees)} employees")
-        
-        # Step 3: Re-sync time logs
-        print("\n⏰ Re-syncing time logs...")
-        sqlite_cursor.execute("SELECT * FROM time_logs ORDER BY id")
-        time_logs = sqlite_cursor.fetchall()
-        
-        for time_log in time_logs:
-            sql_server_cursor.execute("""
-                INSERT INTO time_logs (
-                    id, employee_id, clock_in, clock_out, date, duration_hours,
-                    status, notes, created_at, updated_at, stes_location_id, 
-                    stes_location_name, sync_timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                time_log[0], time_log[1], time_log[2], time_log[3], time_log[4], time_log[5],
-                time_log[6], time_log[7], time_log[8], time_log[9],
-                config['stes_location_id'], config['stes_location_name'], datetime.now()
-            ))
-        
-        sql_server_conn.commit()
-        print(f"✅ Re-synced {len(time_logs)} time logs")
-        
-        # Step 4: Re-sync system logs
-        print("\n📊 Re-syncing system logs...")
-        sqlite_cursor.execute("SELECT * FROM system_logs ORDER BY id")
-        system_logs = sqlite_cursor.fetchall()
-        
-        for system_log in system_logs:
-            # Handle None values
-            employee_id = system_log[2] if system_log[2] is not None else None
+        # Everything inside this block is one transaction, rolled back on error
+        with sql_server_engine.begin() as sql_server_conn:
+            print("✅ Connected to both databases")
             
-            sql_server_cursor.execute("""
-                INSERT INTO system_logs (
-                    id, event_type, employee_id, message, details, timestamp,
-                    stes_location_id, stes_location_name, sync_timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                system_log[0], system_log[1], employee_id, system_log[3], system_log[4], system_log[5],
-                config['stes_location_id'], config['stes_location_name'], datetime.now()
-            ))
+            # Disable secondary indexes for the reload and rebuild them once at
+            # the end. Unique indexes stay on since they enforce constraints.
+            secondary_indexes = sql_server_conn.exec_driver_sql("""
+                SELECT i.name, t.name
+                FROM sys.indexes i
+                JOIN sys.tables t ON i.object_id = t.object_id
+                WHERE t.name IN ('employees', 'time_logs', 'system_logs')
+                  AND i.type_desc = 'NONCLUSTERED'
+                  AND i.is_unique = 0
+                  AND i.is_disabled = 0
+            """).all()
+            for index_name, table_name in secondary_indexes:
+                sql_server_conn.exec_driver_sql(f"ALTER INDEX [{index_name}] ON [{table_name}] DISABLE")
+            
+            # Step 1: Clear all data from SQL Server
+            print("\n🧹 Clearing SQL Server data...")
+            sql_server_conn.exec_driver_sql("DELETE FROM system_logs")
+            sql_server_conn.exec_driver_sql("DELETE FROM time_logs")
+            sql_server_conn.exec_driver_sql("DELETE FROM employees")
+            print("✅ Cleared all data from SQL Server")
+            
+            # One sync timestamp for the whole re-sync
+            location = {
+                'stes_location_id': config['stes_location_id'],
+                'stes_location_name': config['stes_location_name'],
+                'sync_timestamp': datetime.now()
+            }
+            
+            # Step 2: Re-sync employees
+            print("\n👥 Re-syncing employees...")
+            employee_count = copy_table(sqlite_conn, sql_server_conn, 'employees', location)
+            print(f"✅ Re-synced {employee_count} employees")
+            
+            # Step 3: Re-sync time logs
+            print("\n⏰ Re-syncing time logs...")
+            time_log_count = copy_table(sqlite_conn, sql_server_conn, 'time_logs', location)
+            print(f"✅ Re-synced {time_log_count} time logs")
+            
+            # Step 4: Re-sync system logs
+            print("\n📊 Re-syncing system logs...")
+            system_log_count = copy_table(sqlite_conn, sql_server_conn, 'system_logs', location)
+            print(f"✅ Re-synced {system_log_count} system logs")
+            
+            # Rebuild the disabled indexes over the loaded data; the reload
+            # commits when the block exits
+            for index_name, table_name in secondary_indexes:
+                sql_server_conn.exec_driver_sql(f"ALTER INDEX [{index_name}] ON [{table_name}] REBUILD")
+            
+            # The orphan check below looks system logs up by employee_id;
+            # older databases may predate this index
+            sql_server_conn.exec_driver_sql("""
+                IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='IX_system_logs_employee')
+                CREATE INDEX IX_system_logs_employee ON system_logs(employee_id) WHERE employee_id IS NOT NULL
+            """)
         
-        sql_server_conn.commit()
-        print(f"✅ Re-synced {len(system_logs)} system logs")
+        # Separate connection for the read-only verification queries
+        sql_server_conn = sql_server_engine.connect()
         
         # Step 5: Verify data integrity
         print("\n🔍 Verifying data integrity...")
         
-        # Check employee count
-        sqlite_cursor.execute("SELECT COUNT(*) FROM employees")
-        sqlite_employee_count = sqlite_cursor.fetchone()[0]
+        # Check all three table counts in one query per database
+        counts_sql = """
+            SELECT (SELECT COUNT(*) FROM employees),
+                   (SELECT COUNT(*) FROM time_logs),
+                   (SELECT COUNT(*) FROM system_logs)
+        """
+        sqlite_cursor.execute(counts_sql)
+        sqlite_employee_count, sqlite_time_count, sqlite_system_count = sqlite_cursor.fetchone()
         
-        sql_server_cursor.execute("SELECT COUNT(*) FROM employees")
-        sql_server_employee_count = sql_server_cursor.fetchone()[0]
+        sql_server_employee_count, sql_server_time_count, sql_server_system_count = (
+            sql_server_conn.exec_driver_sql(counts_sql).one()
+        )
         
         print(f"Employees - SQLite: {sqlite_employee_count}, SQL Server: {sql_server_employee_count}")
-        
-        # Check time logs count
-        sqlite_cursor.execute("SELECT COUNT(*) FROM time_logs")
-        sqlite_time_count = sqlite_cursor.fetchone()[0]
-        
-        sql_server_cursor.execute("SELECT COUNT(*) FROM time_logs")
-        sql_server_time_count = sql_server_cursor.fetchone()[0]
-        
         print(f"Time logs - SQLite: {sqlite_time_count}, SQL Server: {sql_server_time_count}")
-        
-        # Check system logs count
-        sqlite_cursor.execute("SELECT COUNT(*) FROM system_logs")
-        sqlite_system_count = sqlite_cursor.fetchone()[0]
-        
-        sql_server_cursor.execute("SELECT COUNT(*) FROM system_logs")
-        sql_server_system_count = sql_server_cursor.fetchone()[0]
-        
         print(f"System logs - SQLite: {sqlite_system_count}, SQL Server: {sql_server_system_count}")
         
         # Verify relationships
         print("\n🔗 Verifying relationships...")
         
-        # Check for orphaned time logs
-        sql_server_cursor.execute("""
-            SELECT COUNT(*) FROM time_logs tl
-            LEFT JOIN employees e ON tl.employee_id = e.id
-            WHERE e.id IS NULL
-        """)
-        orphaned_time_logs = sql_server_cursor.fetchone()[0]
+        # Check for orphaned time and system logs in one query; NOT EXISTS
+        # lets SQL Server run each as an anti semi-join over the employee_id
+        # indexes and the employees primary key
+        orphaned_time_logs, orphaned_system_logs = sql_server_conn.exec_driver_sql("""
+            SELECT
+                (SELECT COUNT(*) FROM time_logs tl
+                 WHERE NOT EXISTS (SELECT 1 FROM employees e WHERE e.id = tl.employee_id)),
+                (SELECT COUNT(*) FROM system_logs sl
+                 WHERE sl.employee_id IS NOT NULL
+                   AND NOT EXISTS (SELECT 1 FROM employees e WHERE e.id = sl.employee_id))
+        """).one()
         
         if orphaned_time_logs == 0:
             print("✅ All time logs have valid employee relationships")
         else:
             print(f"❌ Found {orphaned_time_logs} orphaned time logs")
         
-        # Check for orphaned system logs
-        sql_server_cursor.execute("""
-            SELECT COUNT(*) FROM system_logs sl
-            LEFT JOIN employees e ON sl.employee_id = e.id
-            WHERE sl.employee_id IS NOT NULL AND e.id IS NULL
-        """)
-        orphaned_system_logs = sql_server_cursor.fetchone()[0]
-        
         if orphaned_system_logs == 0:
             print("✅ All system logs have valid employee relationships")
         else:
@@ -4,19 +4,26 @@ Fix Time Issues for STES
 Check database and create today's record if needed
 """
 
-import sqlite3
 import sys
 import os
-from datetime import datetime
+import sqlite3
+from datetime import datetime, timedelta
 
 # Add the project root to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from db.connection import open_db
+
+def day_bounds(day):
+    """Return ('YYYY-MM-DD', next 'YYYY-MM-DD') so date filters can use the index"""
+    return day.isoformat(), (day + timedelta(days=1)).isoformat()
+
 def check_database():
     """Check current database status"""
     print("🔍 Checking database status...")
     
-    conn = sqlite3.connect('stes.db')
+    conn = open_db('stes.db')
+    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
     # Check system date
@@ -29,21 +36,21 @@ def check_database():
     cursor.execute("SELECT id, name FROM employees WHERE name = 'Arnav Mehta'")
     arnav = cursor.fetchone()
     if arnav:
-        print(f"👤 Found Arnav Mehta: ID {arnav[0]}")
+        print(f"👤 Found Arnav Mehta: ID {arnav['id']}")
         
         # Check today's records
-        cursor.execute("SELECT COUNT(*) FROM time_logs WHERE employee_id = ? AND DATE(date) = ?", 
-                      (arnav[0], system_date))
-        today_count = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) AS count FROM time_logs WHERE employee_id = ? AND date >= ? AND date < ?", 
+                      (arnav['id'], *day_bounds(system_date)))
+        today_count = cursor.fetchone()['count']
         print(f"📊 Today's records for Arnav: {today_count}")
         
         # Check recent records
         cursor.execute("SELECT date, clock_in, clock_out, status FROM time_logs WHERE employee_id = ? ORDER BY created_at DESC LIMIT 3", 
-                      (arnav[0],))
+                      (arnav['id'],))
         recent = cursor.fetchall()
         print(f"📋 Recent records:")
         for i, record in enumerate(recent, 1):
-            print(f"  {i}. Date: {record[0]}, Clock-in: {record[1]}, Status: {record[3]}")
+            print(f"  {i}. Date: {record['date']}, Clock-in: {record['clock_in']}, Status: {record['status']}")
     else:
         print("❌ Arnav Mehta not found in database!")
     
@@ -53,7 +60,8 @@ def create_fresh_record():
     """Create a fresh record for today"""
     print("\n🆕 Creating fresh record for today...")
     
-    conn = sqlite3.connect('stes.db')
+    conn = open_db('stes.db')
+    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
     # Get Arnav's ID
@@ -65,12 +73,12 @@ def create_fresh_record():
         conn.close()
         return
     
-    arnav_id = arnav[0]
+    arnav_id = arnav['id']
     today = datetime.now().date()
     
     # Delete any existing records for today
-    cursor.execute("DELETE FROM time_logs WHERE employee_id = ? AND DATE(date) = ?", 
-                  (arnav_id, today))
+    cursor.execute("DELETE FROM time_logs WHERE employee_id = ? AND date >= ? AND date < ?", 
+                  (arnav_id, *day_bounds(today)))
     deleted = cursor.rowcount
     if deleted > 0:
         print(f"🗑️ Deleted {deleted} old records for today")
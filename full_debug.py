@@ -4,12 +4,12 @@ Full Debug Script for STES Face Recognition Issue
 """
 
 import sys
-import sqlite3
 from datetime import datetime, timedelta
 sys.path.append('.')
 
 from utils.time_entry_manager import TimeEntryManager
 from config.config import get_config
+from db.connection import get_database_manager
 
 def debug_everything():
     """Debug all aspects of the system"""
@@ -18,17 +18,15 @@ def debug_everything():
     
     # 1. Check database state
     print("\n1️⃣ DATABASE STATE:")
-    conn = sqlite3.connect('stes.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT id, employee_id, clock_in, clock_out, status, created_at FROM time_logs WHERE employee_id = 9 ORDER BY created_at DESC LIMIT 3')
-    rows = cursor.fetchall()
+    # Use the shared manager's pooled engine; TimeEntryManager below gets the
+    # same manager, so every phase reuses one warm, already-tuned connection
+    db_manager = get_database_manager()
+    with db_manager.engine.connect() as conn:
+        rows = conn.exec_driver_sql('SELECT id, employee_id, clock_in, clock_out, status, created_at FROM time_logs WHERE employee_id = 9 ORDER BY created_at DESC LIMIT 3').all()
     print("Recent time logs for Arnav (ID 9):")
     for row in rows:
         print(f"  ID: {row[0]}, Clock-in: {row[2]}, Clock-out: {row[3]}, Status: {row[4]}, Created: {row[5]}")
     
-    conn.close()
-    
     # 2. Check configuration
     print("\n2️⃣ CONFIGURATION:")
     config = get_config()
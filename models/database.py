@@ -3,15 +3,81 @@ Database models for Smart Time Entry System (STES)
 Defines the database schema using SQLAlchemy ORM
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from sqlalchemy import create_engine
 from datetime import datetime
 import json
+import numpy as np
+
+# Optional faster JSON encoder/decoder for system log details
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 Base = declarative_base()
 
+
+def face_encoding_bytes(encoding):
+    """
+    Pack a face encoding as the float32 bytes stored in employees.face_encoding
+    (128 values -> 512 bytes, vs ~2.5 KB as JSON text)
+    
+    Args:
+        encoding: numpy array or list, or legacy JSON text
+        
+    Returns:
+        bytes: Raw float32 encoding
+    """
+    if isinstance(encoding, str):
+        encoding = json.loads(encoding)
+    return np.ascontiguousarray(encoding, dtype=np.float32).tobytes()
+
+
+def face_encoding_json(encoding):
+    """
+    Unpack a stored face encoding as JSON text, for consumers that keep the
+    legacy text format
+    
+    Args:
+        encoding: Raw float32 bytes, or legacy JSON text (returned as is)
+        
+    Returns:
+        str: JSON list of floats, or None for a missing encoding
+    """
+    if encoding is None or isinstance(encoding, str):
+        return encoding
+    return json.dumps(np.frombuffer(encoding, dtype=np.float32).tolist())
+
+
+class JSONText(TypeDecorator):
+    """
+    Text column holding compact JSON; values are dicts/lists in Python and
+    are serialized once, at bind time
+    """
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, str):
+            # Already-serialized JSON passes through untouched
+            return value
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(value).decode('utf-8')
+        return json.dumps(value, separators=(',', ':'), check_circular=False)
+    
+    def process_result_value(self, value, dialect):
+        if not value:
+            return None
+        if ORJSON_AVAILABLE:
+            return orjson.loads(value)
+        return json.loads(value)
+
+
 class Employee(Base):
     """
     Employee model to store employee information and face encodings
@@ -23,7 +89,7 @@ class Employee(Base):
     email = Column(String(100), unique=True)
     department = Column(String(50))
     location_id = Column(Integer, default=1)  # Default to location 1 (Main Office)
-    face_encoding = Column(Text, nullable=False)  # JSON string of face encoding array
+    face_encoding = Column(LargeBinary, nullable=False)  # Raw float32 bytes of face encoding array
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -33,21 +99,24 @@ class Employee(Base):
     
     def set_face_encoding(self, encoding_array):
         """
-        Convert face encoding array to JSON string for storage
+        Convert face encoding array to float32 bytes for storage
         
         Args:
             encoding_array (numpy.ndarray): Face encoding array from face_recognition
         """
-        self.face_encoding = json.dumps(encoding_array.tolist())
+        self.face_encoding = face_encoding_bytes(encoding_array)
     
     def get_face_encoding(self):
         """
         Get face encoding as numpy array
         
         Returns:
-            list: Face encoding as list (convert to numpy array when using)
+            numpy.ndarray: Read-only float32 view of the stored bytes
         """
-        return json.loads(self.face_encoding)
+        if isinstance(self.face_encoding, str):
+            # Legacy JSON text row that hasn't been migrated yet
+            return np.asarray(json.loads(self.face_encoding), dtype=np.float32)
+        return np.frombuffer(self.face_encoding, dtype=np.float32)
     
     def __repr__(self):
         return f"<Employee(id={self.id}, name='{self.name}', department='{self.department}')>"
@@ -70,9 +139,31 @@ class TimeLog(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Per-employee lookups and stats filter on employee_id + date, and the
+        # latest-log lookup orders by created_at within that range
+        Index('ix_timelogs_emp_date_created', 'employee_id', 'date', created_at.desc()),
+        # The Power BI updater polls MAX(updated_at) to spot clock-outs
+        Index('ix_timelogs_updated', 'updated_at'),
+    )
+    
     # Relationship to employee
     employee = relationship("Employee", back_populates="time_logs")
     
+    @staticmethod
+    def status_for(clock_in, clock_out):
+        """
+        Status for a session with the given clock-in/out times
+        
+        Returns:
+            str: 'completed', 'active' or 'incomplete'
+        """
+        if clock_in and clock_out:
+            return 'completed'
+        elif clock_in and not clock_out:
+            return 'active'
+        return 'incomplete'
+    
     def calculate_duration(self):
         """
         Calculate work duration in hours
@@ -89,12 +180,7 @@ class TimeLog(Base):
     
     def update_status(self):
         """Update status based on clock-in/out state"""
-        if self.clock_in and self.clock_out:
-            self.status = 'completed'
-        elif self.clock_in and not self.clock_out:
-            self.status = 'active'
-        else:
-            self.status = 'incomplete'
+        self.status = TimeLog.status_for(self.clock_in, self.clock_out)
     
     def __repr__(self):
         return f"<TimeLog(id={self.id}, employee_id={self.employee_id}, date='{self.date}', status='{self.status}')>"
@@ -110,20 +196,27 @@ class SystemLog(Base):
     event_type = Column(String(50), nullable=False)  # 'face_detected', 'clock_in', 'clock_out', 'error'
     employee_id = Column(Integer, ForeignKey('employees.id'), nullable=True)
     message = Column(Text, nullable=False)
-    details = Column(Text)  # JSON string for additional details
+    details = Column(JSONText)  # Additional details, stored as JSON text
     timestamp = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Exports and per-employee event lookups filter on employee_id and
+        # a time range; the dashboard and sync read the most recent events
+        Index('ix_systemlogs_emp_ts', 'employee_id', 'timestamp'),
+        Index('ix_systemlogs_ts', 'timestamp'),
+    )
+    
     # Relationship to employee (optional)
     employee = relationship("Employee")
     
     def set_details(self, details_dict):
         """
-        Set details as JSON string
+        Set details; JSONText serializes them when the row is written
         
         Args:
             details_dict (dict): Dictionary of additional details
         """
-        self.details = json.dumps(details_dict)
+        self.details = details_dict
     
     def get_details(self):
         """
@@ -132,7 +225,7 @@ class SystemLog(Base):
         Returns:
             dict: Details dictionary
         """
-        return json.loads(self.details) if self.details else {}
+        return self.details or {}
     
     def __repr__(self):
         return f"<SystemLog(id={self.id}, event_type='{self.event_type}', timestamp='{self.timestamp}')>"
@@ -5,17 +5,76 @@ Exports and aggregates data from multiple locations for Power BI
 """
 
 import sqlite3
+import csv
 import pandas as pd
 import os
-import glob
 from datetime import datetime
+from pathlib import Path
 import json
 
+# Parquet copies of the exports (compressed, typed, and much faster for
+# Power BI to load); CSV-only when pyarrow isn't installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# employees.face_encoding holds raw float32 bytes, which are no use in a
+# CSV or to Power BI, so it's left out of the exports
+EXCLUDED_COLUMNS = ('face_encoding',)
+
+def write_parquet_copy(df, csv_path):
+    """Write df as Parquet next to its CSV export when pyarrow is available"""
+    if PYARROW_AVAILABLE:
+        df.to_parquet(Path(csv_path).with_suffix('.parquet'),
+                      engine='pyarrow', compression='zstd', index=False)
+
+def combine_csv_files(files, combined_path):
+    """
+    Concatenate CSV exports row by row, so every value is written back
+    exactly as it was read. Files whose columns differ are aligned on the
+    union of their columns, with empty values where a file lacks one.
+    
+    Args:
+        files (list): CSV files to combine, in order
+        combined_path (Path): Destination CSV
+        
+    Returns:
+        int: Number of records written
+    """
+    headers = []
+    for file in files:
+        with open(file, newline='', encoding='utf-8') as f:
+            headers.append(next(csv.reader(f), []))
+    columns = list(dict.fromkeys(column for header in headers for column in header))
+    
+    count = 0
+    with open(combined_path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(columns)
+        for file, header in zip(files, headers):
+            with open(file, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                if header == columns:
+                    rows = reader
+                else:
+                    positions = {column: i for i, column in enumerate(header)}
+                    rows = ([row[positions[column]] if column in positions else '' for column in columns]
+                            for row in reader)
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+    return count
+
 class MultiLocationExporter:
     def __init__(self, base_directory="."):
         self.base_directory = base_directory
-        self.export_dir = os.path.join(base_directory, 'powerbi_exports')
-        os.makedirs(self.export_dir, exist_ok=True)
+        self.export_dir = Path(base_directory) / 'powerbi_exports'
+        self.export_dir.mkdir(parents=True, exist_ok=True)
     
     def export_single_location(self, location_id: int, location_name: str, db_path: str):
         """Export data for a single location"""
@@ -27,10 +86,13 @@ class MultiLocationExporter:
             
             # Export each table with location information
             tables = ['employees', 'time_logs', 'system_logs']
+            prefix = f'location_{location_id:02d}'
             
             for table in tables:
                 # Read data from SQLite
-                df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")
+                           if row[1] not in EXCLUDED_COLUMNS]
+                df = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM {table}", conn)
                 
                 if not df.empty:
                     # Add location information
@@ -39,9 +101,10 @@ class MultiLocationExporter:
                     df['export_timestamp'] = datetime.now().isoformat()
                     
                     # Save with location prefix
-                    filename = f'location_{location_id:02d}_{table}.csv'
-                    filepath = os.path.join(self.export_dir, filename)
+                    filename = f'{prefix}_{table}.csv'
+                    filepath = self.export_dir / filename
                     df.to_csv(filepath, index=False)
+                    write_parquet_copy(df, filepath)
                     
                     print(f"   ✅ {table}: {len(df)} records → {filename}")
                 else:
@@ -57,43 +120,43 @@ class MultiLocationExporter:
         """Combine data from all locations into single files"""
         print("🔄 Aggregating data from all locations...")
         
-        # Find all location CSV files
-        location_files = glob.glob(os.path.join(self.export_dir, 'location_*_*.csv'))
+        # Find all location CSV files, in location order
+        location_files = sorted(self.export_dir.glob('location_*_*.csv'))
         
         if not location_files:
             print("❌ No location files found. Run export_single_location first.")
             return
         
-        # Group files by table type
+        # Group files by table type; names are location_<id>_<table>.csv
         table_groups = {}
         for file in location_files:
-            filename = os.path.basename(file)
-            parts = filename.split('_')
-            if len(parts) >= 3:
-                table_name = '_'.join(parts[2:]).replace('.csv', '')
-                if table_name not in table_groups:
-                    table_groups[table_name] = []
-                table_groups[table_name].append(file)
+            _, _, table_name = file.stem.split('_', 2)
+            table_groups.setdefault(table_name, []).append(file)
         
         # Combine each table type
         for table_name, files in table_groups.items():
             print(f"📊 Combining {table_name} from {len(files)} locations...")
             
-            all_data = []
-            for file in files:
-                df = pd.read_csv(file)
-                all_data.append(df)
+            combined_filename = f'all_locations_{table_name}.csv'
+            combined_filepath = self.export_dir / combined_filename
             
-            if all_data:
-                # Combine all dataframes
-                combined_df = pd.concat(all_data, ignore_index=True)
-                
-                # Save combined file
-                combined_filename = f'all_locations_{table_name}.csv'
-                combined_filepath = os.path.join(self.export_dir, combined_filename)
-                combined_df.to_csv(combined_filepath, index=False)
-                
-                print(f"   ✅ Combined {len(combined_df)} records → {combined_filename}")
+            record_count = combine_csv_files(files, combined_filepath)
+            
+            if PYARROW_AVAILABLE:
+                # Locations can store the same column differently (e.g. dates
+                # vs timestamps, depending on how the database was created),
+                # so the Parquet copy keeps every column as the CSV's text
+                # rather than a type inferred from some of the rows
+                with open(combined_filepath, newline='', encoding='utf-8') as f:
+                    columns = next(csv.reader(f))
+                combined = pacsv.read_csv(
+                    os.fspath(combined_filepath),
+                    convert_options=pacsv.ConvertOptions(column_types={column: pa.string() for column in columns})
+                )
+                pq.write_table(combined, os.fspath(combined_filepath.with_suffix('.parquet')),
+                               compression='zstd')
+            
+            print(f"   ✅ Combined {record_count} records → {combined_filename}")
         
         print("✅ Multi-location aggregation completed")
     
@@ -102,30 +165,27 @@ class MultiLocationExporter:
         print("📋 Creating location summary...")
         
         summary_data = []
-        location_files = glob.glob(os.path.join(self.export_dir, 'location_*_employees.csv'))
+        location_files = sorted(self.export_dir.glob('location_*_employees.csv'))
         
         for file in location_files:
-            filename = os.path.basename(file)
-            parts = filename.split('_')
-            if len(parts) >= 3:
-                location_id = int(parts[1])
+            location_id = int(file.stem.split('_', 2)[1])
+            
+            # Read employees to get location info
+            df = pd.read_csv(file)
+            if not df.empty:
+                location_name = df['location_name'].iloc[0]
+                employee_count = len(df)
                 
-                # Read employees to get location info
-                df = pd.read_csv(file)
-                if not df.empty:
-                    location_name = df['location_name'].iloc[0]
-                    employee_count = len(df)
-                    
-                    summary_data.append({
-                        'location_id': location_id,
-                        'location_name': location_name,
-                        'employee_count': employee_count,
-                        'export_file': filename
-                    })
+                summary_data.append({
+                    'location_id': location_id,
+                    'location_name': location_name,
+                    'employee_count': employee_count,
+                    'export_file': file.name
+                })
         
         # Save summary
         summary_df = pd.DataFrame(summary_data)
-        summary_file = os.path.join(self.export_dir, 'locations_summary.csv')
+        summary_file = self.export_dir / 'locations_summary.csv'
         summary_df.to_csv(summary_file, index=False)
         
         print(f"✅ Location summary saved: {len(summary_data)} locations")
@@ -178,6 +238,8 @@ def main():
     print("   - all_locations_employees.csv")
     print("   - all_locations_time_logs.csv")
     print("   - all_locations_system_logs.csv")
+    if PYARROW_AVAILABLE:
+        print("   (or the matching .parquet files via 'Get Data' → 'Parquet', which load faster)")
     print("4. Create relationships between tables")
     print("5. Use 'location_name' field for location-based filtering")
 
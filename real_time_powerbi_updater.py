@@ -6,13 +6,36 @@ Monitors database changes and automatically updates Power BI export files
 
 import sqlite3
 import pandas as pd
+import numpy as np
 import os
+import csv
+import gc
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
 from datetime import datetime
 import logging
 from pathlib import Path
 
+# File-system events wake the monitor as soon as the database is written;
+# without watchdog it falls back to polling every check_interval seconds
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+# Parquet copies of the exports (compressed, typed, and much faster for
+# Power BI to load); CSV-only when pyarrow isn't installed
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,6 +43,199 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Rows read from SQLite and written to CSV per chunk, so memory stays bounded
+# by the chunk size rather than the table size
+EXPORT_CHUNK_SIZE = 10_000
+
+# With file-system events, the monitor still re-checks this often in case an
+# event is missed (e.g. on network drives)
+WATCHDOG_FALLBACK_INTERVAL = 60
+
+# A write raises its file events just before the commit becomes visible to
+# other connections, so wait this long after an event before checking
+WATCHDOG_SETTLE_DELAY = 0.25
+
+# Change-detection queries. They run every poll with the same text, so
+# sqlite3's statement cache keeps them prepared on the long-lived connection.
+# Each table's state is its highest id, which grows with every insert (MAX(id)
+# is answered from the end of the primary key, unlike a COUNT(*) scan), plus
+# its latest updated_at for tables whose rows change in place.
+DATA_VERSION_QUERY = "PRAGMA data_version"
+TABLE_STATES_QUERY = (
+    "SELECT (SELECT COALESCE(MAX(id), 0) FROM employees), "
+    "(SELECT MAX(updated_at) FROM employees), "
+    "(SELECT COALESCE(MAX(id), 0) FROM time_logs), "
+    "(SELECT MAX(updated_at) FROM time_logs), "
+    "(SELECT COALESCE(MAX(id), 0) FROM system_logs)"
+)
+
+# After a change is detected, the export waits until the database has had no
+# commits for UPDATE_DEBOUNCE seconds (checked every DEBOUNCE_POLL_INTERVAL),
+# so a burst of writes is exported once. Under constant writes it exports
+# anyway after UPDATE_DEBOUNCE_MAX seconds.
+UPDATE_DEBOUNCE = 2.0
+UPDATE_DEBOUNCE_MAX = 10.0
+DEBOUNCE_POLL_INTERVAL = 0.5
+
+# Tuning for the updater's connection: WAL lets it read while STES writes,
+# NORMAL sync is safe under WAL, and the page cache (20 MB) stays warm
+# between polls
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "cache_size=-20000",
+)
+
+# Define original location assignments based on previous data
+LOCATION_ASSIGNMENTS = {
+    1: "Main Office",      # Location 1
+    2: "Branch Office",    # Location 2  
+    3: "West Coast Office" # Location 3
+}
+
+# Original employee location assignments (based on previous exports)
+EMPLOYEE_LOCATIONS = {
+    1: 3,   # John Doe -> West Coast Office
+    2: 1,   # Jane Smith -> Main Office
+    3: 1,   # Mike Johnson -> Main Office
+    4: 3,   # Alice Johnson -> West Coast Office
+    5: 1,   # Bob Smith -> Main Office
+    6: 1,   # Carol Davis -> Main Office
+    7: 1,   # David Wilson -> Main Office
+    8: 1,   # Emma Brown -> Main Office
+    9: 3,   # Arnav Mehta -> West Coast Office
+    10: 1,  # Sarah Chen -> Main Office
+    11: 3,  # Michael Rodriguez -> West Coast Office
+    12: 3,  # Lisa Thompson -> West Coast Office
+    13: 1,  # James Wilson -> Main Office
+    14: 1,  # Emily Davis -> Main Office
+    15: 1,  # Robert Kim -> Main Office
+    16: 1,  # Jennifer Lee -> Main Office
+    17: 1,  # David Martinez -> Main Office
+    18: 3,  # Tristan Chang -> West Coast Office
+    19: 1,  # Demo -> Main Office
+    20: 1,  # demodemo -> Main Office
+    21: 1,  # Demo3 -> Main Office
+    22: 1,  # demo4 -> Main Office
+    23: 1,  # Test Employee -> Main Office
+    24: 1,  # demo5 -> Main Office
+    25: 1,  # demo6 -> Main Office
+    26: 1,  # demo7 -> Main Office
+    27: 1,  # demo8 -> Main Office
+}
+
+# Location lookup table indexed by employee id; index 0 and ids
+# beyond the table stand for unassigned employees (location 1)
+LOCATION_LUT = np.ones(max(EMPLOYEE_LOCATIONS) + 1, dtype=np.int8)
+LOCATION_LUT[list(EMPLOYEE_LOCATIONS)] = list(EMPLOYEE_LOCATIONS.values())
+LOCATION_NAMES = [LOCATION_ASSIGNMENTS[i] for i in sorted(LOCATION_ASSIGNMENTS)]
+
+# Shared categorical dtype for location_name: each chunk stores int8 codes
+# into these categories, and the Parquet copy gets the same dictionary
+LOCATION_NAME_DTYPE = pd.CategoricalDtype(LOCATION_NAMES)
+
+# Columns of each fixed export, in file order. employees.face_encoding (raw
+# float32 bytes) is deliberately left out: it's no use to Power BI
+REQUIRED_COLUMNS = {
+    'employees': ('id', 'name', 'email', 'department', 'is_active', 'created_at',
+                  'updated_at', 'original_id', 'location_id', 'location_name',
+                  'export_timestamp'),
+    'time_logs': ('id', 'employee_id', 'clock_in', 'clock_out', 'date', 'duration_hours',
+                  'status', 'notes', 'created_at', 'updated_at', 'original_employee_id',
+                  'location_id', 'location_name', 'export_timestamp'),
+    'system_logs': ('id', 'event_type', 'employee_id', 'message', 'details', 'timestamp',
+                    'original_employee_id', 'location_id', 'location_name', 'export_timestamp'),
+}
+
+# The location maps as SQL, for exports whose Power BI columns are computed
+# by SQLite instead of pandas
+LOCATIONS_CTE = (
+    "WITH employee_locations(employee_id, location_id) AS (VALUES "
+    + ", ".join(f"({employee_id}, {location_id})" for employee_id, location_id in EMPLOYEE_LOCATIONS.items())
+    + "), locations(location_id, location_name) AS (VALUES "
+    + ", ".join(f"({location_id}, '{name.replace(chr(39), chr(39) * 2)}')"
+                for location_id, name in LOCATION_ASSIGNMENTS.items())
+    + ")"
+)
+
+# Parquet schema of the system_logs export, which is written straight from
+# SQLite rows with no DataFrame to infer one from; matches what pandas writes
+# for the other exports
+if PYARROW_AVAILABLE:
+    SYSTEM_LOGS_SCHEMA = pa.schema([
+        ('id', pa.int64()),
+        ('event_type', pa.large_string()),
+        ('employee_id', pa.int64()),
+        ('message', pa.large_string()),
+        ('details', pa.large_string()),
+        ('timestamp', pa.large_string()),
+        ('original_employee_id', pa.int64()),
+        ('location_id', pa.int8()),
+        ('location_name', pa.dictionary(pa.int8(), pa.string())),
+        ('export_timestamp', pa.large_string()),
+    ])
+
+def located_query(table, id_column, original_column, incremental):
+    """
+    SQL selecting a table's export columns, with the original id, location
+    and export timestamp computed by SQLite
+    
+    Args:
+        table (str): Table name
+        id_column (str): Employee id column
+        original_column (str): Column keeping the original employee id
+        incremental (bool): Only select rows after an id
+    
+    Returns:
+        str: Query taking the export timestamp (and the last exported id
+            when incremental) as parameters
+    """
+    columns = REQUIRED_COLUMNS[table]
+    table_columns = columns[:columns.index(original_column)]
+    where = "WHERE t.id > ? " if incremental else ""
+    return (
+        f"{LOCATIONS_CTE} "
+        f"SELECT {', '.join(f't.{column}' for column in table_columns)}, "
+        f"t.{id_column} AS {original_column}, "
+        f"l.location_id, l.location_name, ? AS export_timestamp "
+        f"FROM {table} t "
+        f"LEFT JOIN employee_locations el ON el.employee_id = t.{id_column} "
+        f"JOIN locations l ON l.location_id = COALESCE(el.location_id, 1) "
+        f"{where}ORDER BY t.id"
+    )
+
+
+def parquet_schema(df):
+    """
+    Arrow schema for a DataFrame chunk, with all-null columns typed as
+    strings so later chunks that do have values still fit
+    
+    Args:
+        df (pd.DataFrame): First chunk of an export
+        
+    Returns:
+        pa.Schema: Schema for the whole Parquet file
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    return pa.schema([
+        field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+        for field in schema
+    ])
+
+if WATCHDOG_AVAILABLE:
+    class DatabaseFileHandler(FileSystemEventHandler):
+        """Sets an event when the database file or its -wal/-journal sidecar changes"""
+        
+        def __init__(self, db_path, changed):
+            self.db_name = os.path.basename(db_path)
+            self.changed = changed
+        
+        def on_modified(self, event):
+            if os.path.basename(event.src_path).startswith(self.db_name):
+                self.changed.set()
+        
+        on_created = on_modified
+
 class RealTimePowerBIUpdater:
     def __init__(self, db_path="stes.db", export_dir="powerbi_exports", check_interval=5):
         """
@@ -37,235 +253,422 @@ class RealTimePowerBIUpdater:
         self.is_running = False
         self.thread = None
         
+        # Set by file-system events (and by stop_monitoring) to wake the monitor
+        self.db_changed = threading.Event()
+        
         os.makedirs(self.export_dir, exist_ok=True)
         
-        # Track last known record counts
-        self.last_counts = {
-            'time_logs': 0,
-            'system_logs': 0
+        # Last known state of each exported table (see TABLE_STATES_QUERY);
+        # only tables whose state changed are exported again
+        self.last_table_states = {
+            'employees': (0, None),
+            'time_logs': (0, None),
+            'system_logs': (0,)
         }
         
+        # Highest id already written to each append-only export file
+        self.exported_max_ids = {}
+        
+        # One long-lived connection serves change detection and the exports,
+        # so the schema is parsed once rather than on every poll. PRAGMA
+        # data_version is per connection: it changes only when another
+        # connection has committed since this one last looked.
+        self.conn = None
+        self.cursor = None
+        self.last_data_version = None
+        
         logger.info("🔄 Real-Time Power BI Updater initialized")
     
-    def get_current_counts(self):
-        """Get current record counts from database"""
+    def get_connection(self):
+        """Get the updater's SQLite connection, opening it on first use"""
+        if self.conn is None:
+            # Autocommit: the updater only reads, so no transaction is left
+            # open to pin an old WAL snapshot between polls
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                        isolation_level=None)
+            for pragma in SQLITE_PRAGMAS:
+                self.conn.execute(f"PRAGMA {pragma}")
+            # Reused by every poll
+            self.cursor = self.conn.cursor()
+        return self.conn
+    
+    def close_connection(self):
+        """Close the updater's SQLite connection"""
+        if self.conn is not None:
+            self.cursor.close()
+            self.conn.close()
+            self.conn = None
+            self.cursor = None
+            self.last_data_version = None
+    
+    def get_data_version(self):
+        """Get SQLite's data version; it changes whenever another connection commits"""
+        self.get_connection()
+        return self.cursor.execute(DATA_VERSION_QUERY).fetchone()[0]
+    
+    def get_table_states(self):
+        """Get each exported table's current state from database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get counts
-            cursor.execute("SELECT COUNT(*) FROM time_logs")
-            time_logs_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM system_logs")
-            system_logs_count = cursor.fetchone()[0]
-            
-            conn.close()
+            self.get_connection()
+            (employees_max_id, employees_updated_at, time_logs_max_id, time_logs_updated_at,
+             system_logs_max_id) = self.cursor.execute(TABLE_STATES_QUERY).fetchone()
             
             return {
-                'time_logs': time_logs_count,
-                'system_logs': system_logs_count
+                'employees': (employees_max_id, employees_updated_at),
+                'time_logs': (time_logs_max_id, time_logs_updated_at),
+                'system_logs': (system_logs_max_id,)
             }
         except Exception as e:
-            logger.error(f"❌ Error getting database counts: {e}")
-            return self.last_counts
+            logger.error(f"❌ Error getting database table states: {e}")
+            return self.last_table_states
+    
+    def changed_tables(self, table_states):
+        """
+        Tables whose state differs from the last export
+        
+        Args:
+            table_states (dict): States from get_table_states
+            
+        Returns:
+            list: Names of the changed tables
+        """
+        return [table for table, state in table_states.items()
+                if state != self.last_table_states[table]]
     
     def has_changes(self):
-        """Check if database has new records"""
-        current_counts = self.get_current_counts()
+        """Check if database has new or updated records"""
+        # Nothing was written since the last check: skip the state queries
+        data_version = self.get_data_version()
+        if data_version == self.last_data_version:
+            return False, self.last_table_states
+        self.last_data_version = data_version
+        
+        current_table_states = self.get_table_states()
         
-        # Check if any table has new records
-        has_changes = (
-            current_counts['time_logs'] > self.last_counts['time_logs'] or
-            current_counts['system_logs'] > self.last_counts['system_logs']
-        )
+        # Check if any table has new or updated records
+        has_changes = bool(self.changed_tables(current_table_states))
         
         if has_changes:
             logger.info(f"📊 Database changes detected:")
-            logger.info(f"   Time logs: {self.last_counts['time_logs']} → {current_counts['time_logs']}")
-            logger.info(f"   System logs: {self.last_counts['system_logs']} → {current_counts['system_logs']}")
+            for table in self.changed_tables(current_table_states):
+                logger.info(f"   {table}: {self.last_table_states[table]} → {current_table_states[table]}")
         
-        return has_changes, current_counts
+        return has_changes, current_table_states
     
-    def update_powerbi_files(self):
-        """Update Power BI export files with fresh data"""
-        try:
-            logger.info("🔄 Updating Power BI export files...")
+    def wait_for_quiet(self):
+        """
+        Wait for a burst of writes to settle
+        
+        Returns:
+            dict: Table states once the database is quiet
+        """
+        start = quiet_since = time.monotonic()
+        while self.is_running:
+            now = time.monotonic()
+            if now - quiet_since >= UPDATE_DEBOUNCE or now - start >= UPDATE_DEBOUNCE_MAX:
+                break
+            time.sleep(DEBOUNCE_POLL_INTERVAL)
+            data_version = self.get_data_version()
+            if data_version != self.last_data_version:
+                self.last_data_version = data_version
+                quiet_since = time.monotonic()
+        
+        # File events from the burst are covered by this export
+        self.db_changed.clear()
+        return self.get_table_states()
+    
+    def _open_parquet_writer(self, parquet_path, schema, since_id):
+        """
+        Open a Parquet export's temporary file for writing. Parquet can't be
+        appended to, so an incremental export first copies the previous rows
+        into the new file. They're copied in EXPORT_CHUNK_SIZE batches, so
+        the whole previous file is never in memory at once, and the small
+        row groups of earlier appends are merged.
+        
+        Args:
+            parquet_path (str): Parquet export being replaced
+            schema (pa.Schema): Schema for a full export
+            since_id (int): Last exported id of an incremental export, or 0
             
-            # Connect to SQLite database
-            conn = sqlite3.connect(self.db_path)
+        Returns:
+            pq.ParquetWriter: Writer on parquet_path + '.tmp'
+        """
+        if not since_id:
+            return pq.ParquetWriter(parquet_path + '.tmp', schema, compression='zstd')
+        with closing(pq.ParquetFile(parquet_path)) as previous:
+            writer = pq.ParquetWriter(parquet_path + '.tmp', previous.schema_arrow, compression='zstd')
+            try:
+                batches = []
+                for batch in previous.iter_batches(batch_size=EXPORT_CHUNK_SIZE):
+                    batches.append(batch)
+                    if sum(len(b) for b in batches) >= EXPORT_CHUNK_SIZE:
+                        writer.write_table(pa.Table.from_batches(batches))
+                        batches = []
+                if batches:
+                    writer.write_table(pa.Table.from_batches(batches))
+            except BaseException:
+                writer.close()
+                raise
+        return writer
+    
+    def _export_table(self, table, id_column, original_column, export_timestamp, dtype=None,
+                      incremental=False, passthrough=False):
+        """
+        Stream a table into its fixed CSV chunk by chunk, adding the Power BI
+        columns to each chunk. A full export goes to a temporary file that
+        replaces the export only once complete. Incremental (append-only)
+        tables only append rows newer than the last export, once their files
+        exist. With pyarrow, a Parquet copy is written next to the CSV.
+        Passthrough tables get their Power BI columns from SQLite and are
+        written from the raw rows, without building DataFrames.
+        
+        Args:
+            table (str): Table name
+            id_column (str): Employee id column
+            original_column (str): Column keeping the original employee id
+            export_timestamp (str): Timestamp shared by every exported row
+            dtype (dict, optional): Column dtypes for pandas to read with
+            incremental (bool): Append only rows added since the last export
+            passthrough (bool): Write SQLite's rows without pandas
             
-            # Define original location assignments based on previous data
-            location_assignments = {
-                1: "Main Office",      # Location 1
-                2: "Branch Office",    # Location 2  
-                3: "West Coast Office" # Location 3
-            }
+        Returns:
+            int: Number of rows exported
+        """
+        path = os.path.join(self.export_dir, f'all_locations_{table}_fixed.csv')
+        parquet_path = os.path.splitext(path)[0] + '.parquet'
+        exported = os.path.exists(path) and (not PYARROW_AVAILABLE or os.path.exists(parquet_path))
+        since_id = self.exported_max_ids.get(table, 0) if incremental and exported else 0
+        if since_id:
+            query, params, out_path = f"SELECT * FROM {table} WHERE id > ? ORDER BY id", (since_id,), path
+        else:
+            query, params, out_path = f"SELECT * FROM {table} ORDER BY id", None, path + '.tmp'
+        rows = 0
+        max_id = since_id
+        parquet_writer = None
+        # An incremental export appends to the live CSV; remember where the
+        # new rows start so a failed export can take them back out
+        append_offset = os.path.getsize(path) if since_id else None
+        committed = False
+        
+        try:
+            # Each worker reads through its own read-only connection;
+            # sqlite3 connections can't be shared between threads
+            with closing(sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)) as conn:
+                if passthrough:
+                    # SQLite computes the Power BI columns, and its rows are
+                    # written to the CSV as they are fetched
+                    cursor = conn.execute(located_query(table, id_column, original_column, bool(since_id)),
+                                          (export_timestamp, *(params or ())))
+                    columns = [description[0] for description in cursor.description]
+                    for batch in iter(lambda: cursor.fetchmany(EXPORT_CHUNK_SIZE), []):
+                        first = not rows and not since_id
+                        with open(out_path, 'w' if first else 'a', newline='', encoding='utf-8') as f:
+                            writer = csv.writer(f)
+                            if first:
+                                writer.writerow(columns)
+                            writer.writerows(batch)
+                        
+                        if PYARROW_AVAILABLE:
+                            if parquet_writer is None:
+                                parquet_writer = self._open_parquet_writer(parquet_path, SYSTEM_LOGS_SCHEMA, since_id)
+                            data = dict(zip(columns, zip(*batch)))
+                            # Encode location_name through LOCATION_NAME_DTYPE so
+                            # every batch and file carries the same dictionary of
+                            # all locations, not just the ones this batch holds
+                            codes = pd.Categorical(data['location_name'], dtype=LOCATION_NAME_DTYPE).codes
+                            data['location_name'] = pa.DictionaryArray.from_arrays(
+                                pa.array(codes, pa.int8()), pa.array(LOCATION_NAMES, pa.string())
+                            )
+                            parquet_writer.write_table(pa.Table.from_pydict(data, schema=parquet_writer.schema))
+                        
+                        rows += len(batch)
+                        max_id = batch[-1][0]
+                else:
+                    for chunk in pd.read_sql_query(query, conn, params=params,
+                                                   chunksize=EXPORT_CHUNK_SIZE, dtype=dtype):
+                        # ALWAYS add required columns for Power BI compatibility
+                        chunk[original_column] = chunk[id_column]  # Keep original ID for Power BI
+                        
+                        # Assign locations based on employee ID with one vectorized
+                        # lookup; missing and unknown ids fall on index 0
+                        ids = chunk[id_column].to_numpy(dtype=np.int64, na_value=0)
+                        ids = np.where((ids > 0) & (ids < len(LOCATION_LUT)), ids, 0)
+                        chunk['location_id'] = LOCATION_LUT[ids]
+                        chunk['location_name'] = pd.Categorical.from_codes(chunk['location_id'] - 1, dtype=LOCATION_NAME_DTYPE)
+                        chunk['export_timestamp'] = export_timestamp
+                        
+                        # Exactly the required columns, in order; any missing
+                        # from the table come out empty
+                        chunk = chunk.reindex(columns=REQUIRED_COLUMNS[table])
+                        
+                        first = not rows and not since_id
+                        chunk.to_csv(out_path, index=False, mode='w' if first else 'a', header=first)
+                        
+                        if PYARROW_AVAILABLE:
+                            if parquet_writer is None:
+                                parquet_writer = self._open_parquet_writer(parquet_path, parquet_schema(chunk), since_id)
+                            parquet_writer.write_table(
+                                pa.Table.from_pandas(chunk, schema=parquet_writer.schema, preserve_index=False)
+                            )
+                        
+                        if not rows:
+                            # Every chunk gets the same columns, so the first
+                            # chunk's are what the file holds
+                            columns = list(chunk.columns)
+                        rows += len(chunk)
+                        max_id = int(chunk['id'].iloc[-1])
             
-            # Original employee location assignments (based on previous exports)
-            employee_locations = {
-                1: 3,   # John Doe -> West Coast Office
-                2: 1,   # Jane Smith -> Main Office
-                3: 1,   # Mike Johnson -> Main Office
-                4: 3,   # Alice Johnson -> West Coast Office
-                5: 1,   # Bob Smith -> Main Office
-                6: 1,   # Carol Davis -> Main Office
-                7: 1,   # David Wilson -> Main Office
-                8: 1,   # Emma Brown -> Main Office
-                9: 3,   # Arnav Mehta -> West Coast Office
-                10: 1,  # Sarah Chen -> Main Office
-                11: 3,  # Michael Rodriguez -> West Coast Office
-                12: 3,  # Lisa Thompson -> West Coast Office
-                13: 1,  # James Wilson -> Main Office
-                14: 1,  # Emily Davis -> Main Office
-                15: 1,  # Robert Kim -> Main Office
-                16: 1,  # Jennifer Lee -> Main Office
-                17: 1,  # David Martinez -> Main Office
-                18: 3,  # Tristan Chang -> West Coast Office
-                19: 1,  # Demo -> Main Office
-                20: 1,  # demodemo -> Main Office
-                21: 1,  # Demo3 -> Main Office
-                22: 1,  # demo4 -> Main Office
-                23: 1,  # Test Employee -> Main Office
-                24: 1,  # demo5 -> Main Office
-                25: 1,  # demo6 -> Main Office
-                26: 1,  # demo7 -> Main Office
-                27: 1,  # demo8 -> Main Office
-            }
+            if rows:
+                if out_path != path:
+                    os.replace(out_path, path)
+                if parquet_writer is not None:
+                    parquet_writer.close()
+                    parquet_writer = None
+                    os.replace(parquet_path + '.tmp', parquet_path)
+            committed = True
+        finally:
+            # After a failure, nothing half-written is left behind and the
+            # previous export stays in place
+            if parquet_writer is not None:
+                parquet_writer.close()
+            if not committed and append_offset is not None:
+                os.truncate(path, append_offset)
+            for tmp_path in {out_path, parquet_path + '.tmp'} - {path}:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        
+        # Only advanced once both files hold the new rows
+        if incremental:
+            self.exported_max_ids[table] = max_id
+        if not rows:
+            return 0
+        
+        # Verified against the frames just written rather than by reading
+        # the file back
+        logger.info(f"📋 {table} columns: {columns}")
+        if original_column in columns:
+            logger.info(f"🔍 Verification - {os.path.basename(path)}: {rows} rows with {original_column}")
+        else:
+            logger.error(f"❌ Verification - {os.path.basename(path)} is missing {original_column}")
+        return rows
+    
+    def update_powerbi_files(self, tables=None):
+        """
+        Update Power BI export files with fresh data
+        
+        Args:
+            tables (list, optional): Tables to export; all of them by default
+        """
+        try:
+            logger.info("🔄 Updating Power BI export files...")
             
-            # Export employees with original IDs (Power BI compatible)
-            employees_df = pd.read_sql_query("SELECT * FROM employees", conn)
-            if not employees_df.empty:
-                # ALWAYS add required columns for Power BI compatibility
-                employees_df['original_id'] = employees_df['id']  # Keep original ID for Power BI
-                
-                # Assign locations based on employee ID
-                employees_df['location_id'] = employees_df['id'].map(employee_locations).fillna(1)
-                employees_df['location_name'] = employees_df['location_id'].map(location_assignments)
-                employees_df['export_timestamp'] = datetime.now().isoformat()
-                
-                # Ensure all required columns are present
-                required_columns = ['id', 'name', 'email', 'department', 'face_encoding', 'is_active', 
-                                  'created_at', 'updated_at', 'original_id', 'location_id', 'location_name', 'export_timestamp']
-                for col in required_columns:
-                    if col not in employees_df.columns:
-                        if col == 'original_id':
-                            employees_df[col] = employees_df['id']  # Original ID
-                        else:
-                            employees_df[col] = None
-                
-                # Save to fixed CSV file
-                fixed_employees_path = os.path.join(self.export_dir, 'all_locations_employees_fixed.csv')
-                employees_df.to_csv(fixed_employees_path, index=False)
-                
-                # Verify the file was written correctly
-                verification_df = pd.read_csv(fixed_employees_path)
-                has_original_id = 'original_id' in verification_df.columns
-                logger.info(f"✅ Exported {len(employees_df)} employees with original location assignments")
-                logger.info(f"📋 Employee columns: {list(employees_df.columns)}")
-                logger.info(f"🔍 Verification - original_id present: {has_original_id}")
+            # One timestamp shared by every exported row
+            export_timestamp = datetime.now().isoformat()
             
-            # Export time logs with original IDs (Power BI compatible)
-            time_logs_df = pd.read_sql_query("SELECT * FROM time_logs", conn)
-            if not time_logs_df.empty:
-                # ALWAYS add required columns for Power BI compatibility
-                time_logs_df['original_employee_id'] = time_logs_df['employee_id']  # Keep original ID for Power BI
-                
-                # Assign locations based on employee ID
-                time_logs_df['location_id'] = time_logs_df['employee_id'].map(employee_locations).fillna(1)
-                time_logs_df['location_name'] = time_logs_df['location_id'].map(location_assignments)
-                time_logs_df['export_timestamp'] = datetime.now().isoformat()
-                
-                # Ensure all required columns are present
-                required_columns = ['id', 'employee_id', 'clock_in', 'clock_out', 'date', 'duration_hours', 
-                                  'status', 'notes', 'created_at', 'updated_at', 'original_employee_id', 
-                                  'location_id', 'location_name', 'export_timestamp']
-                for col in required_columns:
-                    if col not in time_logs_df.columns:
-                        if col == 'original_employee_id':
-                            time_logs_df[col] = time_logs_df['employee_id']
-                        else:
-                            time_logs_df[col] = None
-                
-                # Save to fixed CSV file
-                fixed_time_logs_path = os.path.join(self.export_dir, 'all_locations_time_logs_fixed.csv')
-                time_logs_df.to_csv(fixed_time_logs_path, index=False)
-                
-                # Verify the file was written correctly
-                verification_df = pd.read_csv(fixed_time_logs_path)
-                has_original_employee_id = 'original_employee_id' in verification_df.columns
-                logger.info(f"✅ Exported {len(time_logs_df)} time logs with original location assignments")
-                logger.info(f"📋 Time logs columns: {list(time_logs_df.columns)}")
-                logger.info(f"🔍 Verification - original_employee_id present: {has_original_employee_id}")
+            # Export employees with original IDs (Power BI compatible). SQLite
+            # stores is_active as 0/1; reading it as nullable boolean writes
+            # it as a one-byte Parquet column and a True/False CSV column.
+            # System logs need no pandas work, so their rows go from SQLite
+            # to the files directly. They are never updated in place, so after
+            # the first export only new rows are appended (employees and time
+            # logs change in place, e.g. on clock-out, and are rewritten
+            # instead)
+            exports = {
+                'employees': (('id', 'original_id'), {'dtype': {'is_active': 'boolean'}}, "employees"),
+                'time_logs': (('employee_id', 'original_employee_id'), {}, "time logs"),
+                'system_logs': (('employee_id', 'original_employee_id'),
+                                {'incremental': True, 'passthrough': True}, "new system logs"),
+            }
+            if tables is not None:
+                exports = {table: exports[table] for table in tables}
             
-            # Export system logs with original IDs (Power BI compatible)
-            system_logs_df = pd.read_sql_query("SELECT * FROM system_logs", conn)
-            if not system_logs_df.empty:
-                # ALWAYS add required columns for Power BI compatibility
-                system_logs_df['original_employee_id'] = system_logs_df['employee_id']  # Keep original ID for Power BI
-                
-                # Assign locations based on employee ID (handle NaN values)
-                system_logs_df['location_id'] = system_logs_df['employee_id'].map(employee_locations).fillna(1)
-                system_logs_df['location_name'] = system_logs_df['location_id'].map(location_assignments)
-                system_logs_df['export_timestamp'] = datetime.now().isoformat()
-                
-                # Ensure all required columns are present
-                required_columns = ['id', 'event_type', 'employee_id', 'message', 'details', 'timestamp', 
-                                  'original_employee_id', 'location_id', 'location_name', 'export_timestamp']
-                for col in required_columns:
-                    if col not in system_logs_df.columns:
-                        if col == 'original_employee_id':
-                            system_logs_df[col] = system_logs_df['employee_id']
-                        else:
-                            system_logs_df[col] = None
-                
-                # Save to fixed CSV file
-                fixed_system_logs_path = os.path.join(self.export_dir, 'all_locations_system_logs_fixed.csv')
-                system_logs_df.to_csv(fixed_system_logs_path, index=False)
-                
-                # Verify the file was written correctly
-                verification_df = pd.read_csv(fixed_system_logs_path)
-                has_original_employee_id = 'original_employee_id' in verification_df.columns
-                logger.info(f"✅ Exported {len(system_logs_df)} system logs with original location assignments")
-                logger.info(f"📋 System logs columns: {list(system_logs_df.columns)}")
-                logger.info(f"🔍 Verification - original_employee_id present: {has_original_employee_id}")
+            # The tables are independent, so each is exported on its own
+            # thread: one table's CSV/Parquet writes overlap the others' reads
+            failed = []
+            with ThreadPoolExecutor(max_workers=len(exports)) as executor:
+                futures = {
+                    executor.submit(self._export_table, table, *columns, export_timestamp, **options): table
+                    for table, (columns, options, _) in exports.items()
+                }
+                for future in as_completed(futures):
+                    table = futures[future]
+                    try:
+                        count = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Error exporting {table}: {e}")
+                        failed.append(table)
+                        continue
+                    if count:
+                        logger.info(f"✅ Exported {count} {exports[table][2]} with original location assignments")
             
-            conn.close()
+            if failed:
+                logger.error(f"❌ Power BI files not updated for: {', '.join(failed)}")
+                return
             
             self.last_update_time = datetime.now()
             logger.info("✅ Power BI files updated successfully!")
             
         except Exception as e:
             logger.error(f"❌ Error updating Power BI files: {e}")
+        finally:
+            # The monitor runs indefinitely; collect the export chunks' pandas
+            # reference cycles now rather than whenever the next GC runs
+            gc.collect()
     
     def monitor_database(self):
         """Monitor database for changes and update Power BI files"""
         logger.info(f"🔍 Starting database monitoring (checking every {self.check_interval} seconds)...")
         
-        # Initialize last counts
-        self.last_counts = self.get_current_counts()
-        logger.info(f"📊 Initial database state: {self.last_counts}")
+        # Initialize last max ids
+        self.last_data_version = self.get_data_version()
+        for row in self.cursor.execute(f"EXPLAIN QUERY PLAN {TABLE_STATES_QUERY}"):
+            logger.debug(f"🔎 Table state query plan: {row[-1]}")
+        self.last_table_states = self.get_table_states()
+        logger.info(f"📊 Initial database state: {self.last_table_states}")
+        
+        # Watch the database's directory, since SQLite also writes -wal and
+        # -journal files next to it; data_version filters out writes that
+        # didn't commit anything new
+        observer = None
+        wait_interval = self.check_interval
+        if WATCHDOG_AVAILABLE:
+            observer = Observer()
+            observer.schedule(DatabaseFileHandler(self.db_path, self.db_changed),
+                              os.path.dirname(os.path.abspath(self.db_path)))
+            observer.start()
+            wait_interval = max(self.check_interval, WATCHDOG_FALLBACK_INTERVAL)
+            logger.info("👀 Watching the database file for changes")
         
         while self.is_running:
             try:
                 # Check for changes
-                has_changes, current_counts = self.has_changes()
+                has_changes, current_table_states = self.has_changes()
                 
                 if has_changes:
-                    # Update Power BI files
-                    self.update_powerbi_files()
+                    # Let the rest of a burst land, then export it all at once
+                    current_table_states = self.wait_for_quiet()
+                    
+                    # Update only the Power BI files whose tables changed
+                    self.update_powerbi_files(self.changed_tables(current_table_states))
                     
-                    # Update last counts
-                    self.last_counts = current_counts
+                    # Update last table states
+                    self.last_table_states = current_table_states
                     
                     logger.info("🎯 Power BI files updated! You can now refresh your dashboard.")
                 
-                # Wait before next check
-                time.sleep(self.check_interval)
+                # Wait for a database write (or the next check)
+                if self.db_changed.wait(wait_interval) and self.is_running:
+                    time.sleep(WATCHDOG_SETTLE_DELAY)
+                self.db_changed.clear()
                 
             except Exception as e:
                 logger.error(f"❌ Error in database monitoring: {e}")
                 time.sleep(self.check_interval)
+        
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        self.close_connection()
     
     def start_monitoring(self):
         """Start the real-time monitoring"""
@@ -288,6 +691,7 @@ class RealTimePowerBIUpdater:
             return
         
         self.is_running = False
+        self.db_changed.set()
         if self.thread:
             self.thread.join(timeout=5)
         
@@ -298,7 +702,7 @@ class RealTimePowerBIUpdater:
         return {
             'is_running': self.is_running,
             'last_update_time': self.last_update_time,
-            'last_counts': self.last_counts,
+            'last_table_states': self.last_table_states,
             'check_interval': self.check_interval
         }
 
@@ -7,9 +7,10 @@ Provides easy commands to run different parts of the system
 import os
 import sys
 import argparse
+import functools
+import importlib.util
 import subprocess
 import logging
-from datetime import datetime
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +19,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Import names of the packages the system needs
+REQUIRED_PACKAGES = ('cv2', 'streamlit', 'sqlalchemy', 'pandas', 'numpy', 'PIL')
+
 def print_banner():
     """Print the STES banner"""
     banner = """
@@ -33,43 +37,88 @@ def print_banner():
     """
     print(banner)
 
+@functools.lru_cache(maxsize=None)
+def package_available(name):
+    """
+    Check whether a package is installed without importing it; find_spec
+    only locates the module on disk
+    
+    Args:
+        name (str): Top-level import name
+        
+    Returns:
+        bool: True if the package can be imported
+    """
+    return importlib.util.find_spec(name) is not None
+
 def check_requirements():
     """Check if all requirements are installed"""
-    try:
-        import cv2
-        import streamlit
-        import sqlalchemy
-        import pandas
-        import numpy
-        import PIL
-        
-        # Face recognition is optional - we have mock implementation
-        try:
-            import face_recognition
-            logger.info("✅ All required packages are installed (with real face recognition)")
-        except ImportError:
-            logger.info("✅ Core packages installed (using mock face recognition for demo)")
-        
-        return True
-        
-    except ImportError as e:
-        logger.error(f"❌ Missing required package: {e}")
+    missing = [name for name in REQUIRED_PACKAGES if not package_available(name)]
+    if missing:
+        logger.error(f"❌ Missing required package: {', '.join(missing)}")
         logger.error("Please install requirements: pip install -r requirements.txt")
         return False
+    
+    # Face recognition is optional - we have mock implementation
+    if package_available('face_recognition'):
+        logger.info("✅ All required packages are installed (with real face recognition)")
+    else:
+        logger.info("✅ Core packages installed (using mock face recognition for demo)")
+    
+    return True
+
+def run_main(module, *args):
+    """
+    Run a script module's main() in this process, with args as its command
+    line, instead of starting another interpreter and re-importing everything
+    
+    Args:
+        module: Imported script module
+        *args: Command-line arguments for its argument parser
+        
+    Returns:
+        bool: True unless main() exited with a non-zero status
+    """
+    saved_argv = sys.argv
+    sys.argv = [module.__file__, *args]
+    try:
+        module.main()
+        return True
+    except SystemExit as e:
+        return not e.code
+    finally:
+        sys.argv = saved_argv
+
+def run_in_place(command):
+    """
+    Run a command in place of the launcher. On POSIX the process image is
+    replaced (exec), so no idle launcher stays alive for the command's
+    lifetime; Windows has no real exec, so there it runs as a child process.
+    
+    Args:
+        command (list): Program and arguments; the program must be a full path
+    """
+    if os.name == 'posix':
+        # exec discards anything still buffered
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            os.execv(command[0], command)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not exec {command[0]} ({e}); running it as a subprocess")
+    subprocess.run(command)
 
 def setup_database():
     """Set up the database"""
     try:
         logger.info("🔧 Setting up database...")
-        result = subprocess.run([
-            sys.executable, 'db/setup_database.py', '--sample-data'
-        ], capture_output=True, text=True)
+        from db import setup_database as database_setup
         
-        if result.returncode == 0:
+        if run_main(database_setup, '--sample-data'):
             logger.info("✅ Database setup completed")
             return True
         else:
-            logger.error(f"❌ Database setup failed: {result.stderr}")
+            logger.error("❌ Database setup failed")
             return False
             
     except Exception as e:
@@ -80,15 +129,13 @@ def create_sample_data():
     """Create sample data for testing"""
     try:
         logger.info("📊 Creating sample data...")
-        result = subprocess.run([
-            sys.executable, 'utils/create_sample_data.py'
-        ], capture_output=True, text=True)
+        from utils import create_sample_data as sample_data
         
-        if result.returncode == 0:
+        if run_main(sample_data):
             logger.info("✅ Sample data created")
             return True
         else:
-            logger.error(f"❌ Sample data creation failed: {result.stderr}")
+            logger.error("❌ Sample data creation failed")
             return False
             
     except Exception as e:
@@ -103,7 +150,7 @@ def run_streamlit():
         logger.info("🔗 URL: http://localhost:8501")
         
         # Run streamlit
-        subprocess.run([
+        run_in_place([
             sys.executable, '-m', 'streamlit', 'run', 'ui/main.py'
         ])
         
@@ -114,9 +161,9 @@ def register_employee():
     """Run the employee registration utility"""
     try:
         logger.info("👥 Starting employee registration...")
-        subprocess.run([
-            sys.executable, 'utils/register_employee.py', '--interactive'
-        ])
+        from utils import register_employee as registration
+        
+        run_main(registration, '--interactive')
         
     except Exception as e:
         logger.error(f"❌ Employee registration error: {e}")
@@ -136,8 +183,8 @@ def show_status():
         
         # Database status
         try:
-            employees = db_manager.get_all_employees()
-            print(f"📚 Database: ✅ Connected ({len(employees)} employees)")
+            employee_count = db_manager.get_employee_count()
+            print(f"📚 Database: ✅ Connected ({employee_count} employees)")
         except Exception as e:
             print(f"📚 Database: ❌ Error - {e}")
         
@@ -161,8 +208,6 @@ def show_status():
 
 def main():
     """Main function"""
-    print_banner()
-    
     parser = argparse.ArgumentParser(
         description='Smart Time Entry System (STES) - Main Launcher',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -189,12 +234,19 @@ Examples:
     
     args = parser.parse_args()
     
+    # The banner is for people at a terminal; it's skipped for status and
+    # when output is piped or logged, and never shown for usage errors
+    if sys.stdout.isatty() and args.command != 'status':
+        print_banner()
+    
     try:
         if args.command == 'install':
             # Install requirements
             logger.info("📦 Installing requirements...")
-            subprocess.run([
-                sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'
+            # Skip pip's version check and prompts
+            run_in_place([
+                sys.executable, '-m', 'pip', 'install', '--disable-pip-version-check',
+                '--no-input', '-r', 'requirements.txt'
             ])
             
         elif args.command == 'setup':
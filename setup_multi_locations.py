@@ -9,6 +9,71 @@ import sqlite3
 import shutil
 from datetime import datetime
 import sys
+import argparse
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Basic schema for a brand-new location database, run as one script
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS employees (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE,
+    department TEXT,
+    face_encoding TEXT NOT NULL,
+    is_active BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS time_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id INTEGER NOT NULL,
+    clock_in TIMESTAMP,
+    clock_out TIMESTAMP,
+    date DATE NOT NULL,
+    duration_hours TEXT,
+    status TEXT DEFAULT 'active',
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (employee_id) REFERENCES employees (id)
+);
+
+CREATE TABLE IF NOT EXISTS system_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    employee_id INTEGER,
+    message TEXT NOT NULL,
+    details TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (employee_id) REFERENCES employees (id)
+);
+"""
+
+def existing_files():
+    """
+    Snapshot the working directory's file names with one scandir, so
+    existence checks are set lookups rather than a stat call each
+    
+    Returns:
+        set: File names in the current directory
+    """
+    with os.scandir('.') as entries:
+        return {entry.name for entry in entries}
+
+def checkpoint_template():
+    """
+    Fold stes.db's WAL into the main file, so a byte copy of the file holds
+    every committed row
+    
+    Returns:
+        bool: True if the checkpoint completed; False if another connection
+            kept it from finishing
+    """
+    with closing(sqlite3.connect('stes.db')) as source:
+        busy, _, _ = source.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+    return not busy
 
 class MultiLocationSetup:
     def __init__(self):
@@ -33,67 +98,48 @@ class MultiLocationSetup:
             }
         ]
     
-    def setup_location_database(self, location):
-        """Set up database for a specific location"""
+    def setup_location_database(self, location, existing=None):
+        """
+        Set up database for a specific location
+        
+        Args:
+            location (dict): Location configuration
+            existing (set, optional): Names of the files in the working
+                directory, from existing_files(), taken after stes.db was
+                checkpointed; checked (and checkpointed) here if omitted
+            
+        Returns:
+            str: Path to the location's database
+        """
         print(f"🚀 Setting up database for Location {location['id']}: {location['name']}")
         
+        if existing is None:
+            existing = existing_files()
+            if 'stes.db' in existing and not checkpoint_template():
+                raise RuntimeError("stes.db is busy and couldn't be checkpointed")
+        
         # Create location-specific database
         db_path = location['db_name']
         
-        if os.path.exists(db_path):
+        if db_path in existing:
             print(f"   ⚠️  Database {db_path} already exists")
             return db_path
         
         # Copy existing database structure
-        if os.path.exists('stes.db'):
-            shutil.copy('stes.db', db_path)
+        if 'stes.db' in existing:
+            # stes.db has been checkpointed, so its main file holds every
+            # committed row; copy the bytes only (copyfile uses sendfile on
+            # Linux and skips copying permission bits)
+            shutil.copyfile('stes.db', db_path)
             print(f"   ✅ Created {db_path} from existing database")
         else:
-            # Create new database with proper schema
+            # Create new database with proper schema. WAL mode is stored in
+            # the file, so it is set once here
             conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
+            conn.execute('PRAGMA journal_mode=WAL')
             
             # Create tables (basic schema)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS employees (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT UNIQUE,
-                    department TEXT,
-                    face_encoding TEXT NOT NULL,
-                    is_active BOOLEAN DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS time_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    employee_id INTEGER NOT NULL,
-                    clock_in TIMESTAMP,
-                    clock_out TIMESTAMP,
-                    date DATE NOT NULL,
-                    duration_hours TEXT,
-                    status TEXT DEFAULT 'active',
-                    notes TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (employee_id) REFERENCES employees (id)
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS system_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event_type TEXT NOT NULL,
-                    employee_id INTEGER,
-                    message TEXT NOT NULL,
-                    details TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (employee_id) REFERENCES employees (id)
-                )
-            ''')
+            conn.executescript(SCHEMA_SQL)
             
             conn.commit()
             conn.close()
@@ -106,6 +152,7 @@ class MultiLocationSetup:
         print(f"📊 Adding sample data for Location {location['id']}")
         
         conn = sqlite3.connect(db_path)
+        conn.execute('PRAGMA synchronous=NORMAL')
         cursor = conn.cursor()
         
         # Add sample employees for this location
@@ -116,23 +163,26 @@ class MultiLocationSetup:
             (f"David Wilson - {location['name']}", f"david.{location['id']}@company.com", "HR")
         ]
         
-        for name, email, department in sample_employees:
-            cursor.execute('''
+        # All inserts go in one transaction (one commit), each table's rows
+        # as a single executemany
+        with conn:
+            cursor.executemany('''
                 INSERT OR IGNORE INTO employees (name, email, department, face_encoding)
                 VALUES (?, ?, ?, ?)
-            ''', (name, email, department, "sample_encoding"))
-        
-        # Add sample time logs
-        cursor.execute('SELECT id FROM employees LIMIT 2')
-        employee_ids = [row[0] for row in cursor.fetchall()]
-        
-        for emp_id in employee_ids:
-            cursor.execute('''
+            ''', [(name, email, department, "sample_encoding")
+                  for name, email, department in sample_employees])
+            
+            # Add sample time logs
+            cursor.execute('SELECT id FROM employees LIMIT 2')
+            employee_ids = [row[0] for row in cursor.fetchall()]
+            
+            now = datetime.now()
+            today = now.date()
+            cursor.executemany('''
                 INSERT INTO time_logs (employee_id, clock_in, date, status)
                 VALUES (?, ?, ?, ?)
-            ''', (emp_id, datetime.now(), datetime.now().date(), 'active'))
+            ''', [(emp_id, now, today, 'active') for emp_id in employee_ids])
         
-        conn.commit()
         conn.close()
         print(f"   ✅ Added sample data to {db_path}")
     
@@ -145,13 +195,12 @@ class MultiLocationSetup:
             conn = sqlite3.connect(db_path)
             cursor = conn.cursor()
             
-            # Test employee count
-            cursor.execute('SELECT COUNT(*) FROM employees')
-            employee_count = cursor.fetchone()[0]
-            
-            # Test time logs count
-            cursor.execute('SELECT COUNT(*) FROM time_logs')
-            time_logs_count = cursor.fetchone()[0]
+            # Test employee and time log counts in one query
+            cursor.execute('''
+                SELECT (SELECT COUNT(*) FROM employees),
+                       (SELECT COUNT(*) FROM time_logs)
+            ''')
+            employee_count, time_logs_count = cursor.fetchone()
             
             conn.close()
             
@@ -165,25 +214,60 @@ class MultiLocationSetup:
             print(f"   ❌ Location {location['id']} test failed: {e}")
             return False
     
-    def setup_all_locations(self):
-        """Set up all locations"""
+    def _one_location(self, location, existing):
+        """
+        Set up, populate and test a single location
+        
+        Args:
+            location (dict): Location configuration
+            existing (set): Names of the files in the working directory
+            
+        Returns:
+            bool: True if the location passed its test
+        """
+        print(f"\n📍 Processing Location {location['id']}: {location['name']}")
+        
+        # Set up database
+        db_path = self.setup_location_database(location, existing)
+        
+        # Add sample data
+        self.add_sample_data_to_location(location, db_path)
+        
+        # Test location
+        return self.test_location_independently(location, db_path)
+    
+    def setup_all_locations(self, jobs=None):
+        """
+        Set up all locations
+        
+        Args:
+            jobs (int, optional): Locations to set up at once; defaults to all of them
+            
+        Returns:
+            list: Locations that passed their test
+        """
         print("🌍 Setting up Multi-Location STES")
         print("=" * 50)
         
-        successful_locations = []
+        # Each location has its own database file and opens its own
+        # connections, so the locations are set up on parallel threads
+        passed = set()
+        existing = existing_files()
         
-        for location in self.locations:
-            print(f"\n📍 Processing Location {location['id']}: {location['name']}")
-            
-            # Set up database
-            db_path = self.setup_location_database(location)
-            
-            # Add sample data
-            self.add_sample_data_to_location(location, db_path)
-            
-            # Test location
-            if self.test_location_independently(location, db_path):
-                successful_locations.append(location)
+        # stes.db runs in WAL mode. Checkpoint it once, before any location
+        # copies it, so no copy races a checkpoint writing into the file
+        if 'stes.db' in existing and not checkpoint_template():
+            print("❌ stes.db is busy and couldn't be checkpointed; close anything using it and try again")
+            return []
+        
+        with ThreadPoolExecutor(max_workers=jobs or len(self.locations)) as executor:
+            futures = {executor.submit(self._one_location, location, existing): location['id']
+                       for location in self.locations}
+            for future in as_completed(futures):
+                if future.result():
+                    passed.add(futures[future])
+        
+        successful_locations = [location for location in self.locations if location['id'] in passed]
         
         print(f"\n🎉 Setup complete! {len(successful_locations)} locations ready")
         return successful_locations
@@ -197,16 +281,20 @@ class MultiLocationSetup:
             from multi_location_export import MultiLocationExporter
             
             exporter = MultiLocationExporter()
+            existing = existing_files()
             
-            # Export each location
-            for location in self.locations:
-                db_path = location['db_name']
-                if os.path.exists(db_path):
-                    exporter.export_single_location(
-                        location['id'],
-                        location['name'], 
-                        db_path
-                    )
+            # Export each location; every location reads its own database
+            # and writes its own files, so the exports run on parallel threads
+            locations = [location for location in self.locations if location['db_name'] in existing]
+            if locations:
+                with ThreadPoolExecutor(max_workers=min(4, len(locations))) as executor:
+                    for location in locations:
+                        executor.submit(
+                            exporter.export_single_location,
+                            location['id'],
+                            location['name'],
+                            location['db_name']
+                        )
             
             # Aggregate all locations
             exporter.aggregate_all_locations()
@@ -219,6 +307,11 @@ class MultiLocationSetup:
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Set up and test multiple STES locations')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                       help='Number of locations to set up in parallel (default: all)')
+    args = parser.parse_args()
+    
     setup = MultiLocationSetup()
     
     print("🌍 STES Multi-Location Setup")
@@ -231,7 +324,7 @@ def main():
     print("=" * 50)
     
     # Set up all locations
-    successful_locations = setup.setup_all_locations()
+    successful_locations = setup.setup_all_locations(jobs=args.jobs)
     
     if successful_locations:
         # Run multi-location export
@@ -16,6 +16,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 import json
 
+from db.sql_server_manager import FACE_ENCODING_TYPE_SQL, encode_face_encoding
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -249,8 +251,14 @@ class SQLServerIntegration:
                     new_employee['sync_timestamp'] = datetime.now()
                     new_employees.append(new_employee)
             
+            # Encode face encodings to match the column: JSON text in the
+            # NVARCHAR table created above, bytes if the table is VARBINARY
+            cursor.execute(FACE_ENCODING_TYPE_SQL)
+            column_type = cursor.fetchone()[0].lower()
+            
             # Insert only new employees
             for employee in new_employees:
+                face_encoding = encode_face_encoding(employee.get('face_encoding'), column_type)
                 cursor.execute("""
                     INSERT INTO employees (
                         id, name, email, department, face_encoding, is_active, 
@@ -258,7 +266,7 @@ class SQLServerIntegration:
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     employee['id'], employee['name'], employee.get('email'), employee.get('department'), 
-                    employee.get('face_encoding'), employee.get('is_active', 1),
+                    face_encoding, employee.get('is_active', 1),
                     employee.get('created_at'), employee.get('updated_at'),
                     employee['stes_location_id'], employee['stes_location_name'], employee['sync_timestamp']
                 ))
@@ -397,8 +397,11 @@ def update_powerbi_exports(location_id=None):
         # Connect to database
         conn = sqlite3.connect('stes.db')
         
-        # Get all employees from database
-        all_employees = pd.read_sql_query("SELECT * FROM employees ORDER BY id", conn)
+        # Get all employees from database; face_encoding (raw float32 bytes)
+        # isn't part of the Power BI export
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(employees)")
+                   if row[1] != 'face_encoding']
+        all_employees = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM employees ORDER BY id", conn)
         
         if all_employees.empty:
             print("❌ No employees found in database")
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 import logging
 from typing import List, Dict, Optional
 
+from sqlalchemy import select, func
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -92,15 +94,25 @@ class SQLServerSyncService:
             # Get recent system logs from SQLite
             recent_system_logs = self._get_recent_sqlite_system_logs()
             
-            # Sync time logs
-            for time_log in recent_time_logs:
-                self.sql_server_manager.sync_time_log(time_log)
+            # Sync both tables in one batched transaction
+            if self.sql_server_manager.sync_batch(
+                time_logs=recent_time_logs,
+                system_logs=recent_system_logs
+            ):
+                logger.info(f"✅ Synced {len(recent_time_logs)} time logs and {len(recent_system_logs)} system logs")
+                return
             
-            # Sync system logs
-            for system_log in recent_system_logs:
-                self.sql_server_manager.sync_system_log(system_log)
+            # One bad row rolls the whole batch back; sync row by row so the
+            # rest still get through, and fail the cycle if any row didn't
+            logger.error("❌ Batched sync failed; retrying row by row")
+            failed = (
+                sum(not self.sql_server_manager.sync_time_log(log) for log in recent_time_logs)
+                + sum(not self.sql_server_manager.sync_system_log(log) for log in recent_system_logs)
+            )
+            if failed:
+                raise RuntimeError(f"{failed} of {len(recent_time_logs) + len(recent_system_logs)} rows failed to sync")
             
-            logger.info(f"✅ Synced {len(recent_time_logs)} time logs and {len(recent_system_logs)} system logs")
+            logger.info(f"✅ Synced {len(recent_time_logs)} time logs and {len(recent_system_logs)} system logs row by row")
             
         except Exception as e:
             logger.error(f"❌ Failed to sync recent data: {e}")
@@ -115,30 +127,29 @@ class SQLServerSyncService:
             with self.sqlite_db_manager.get_session() as session:
                 from models.database import TimeLog, Employee
                 
-                recent_logs = session.query(TimeLog).filter(
-                    TimeLog.created_at >= cutoff_time
-                ).order_by(TimeLog.created_at.desc()).all()
-                
-                time_log_data = []
-                for log in recent_logs:
-                    # Get employee name for reference
-                    employee = session.query(Employee).filter_by(id=log.employee_id).first()
-                    
-                    time_log_data.append({
-                        'id': log.id,
-                        'employee_id': log.employee_id,
-                        'employee_name': employee.name if employee else 'Unknown',
-                        'clock_in': log.clock_in,
-                        'clock_out': log.clock_out,
-                        'date': log.date,
-                        'duration_hours': log.duration_hours,
-                        'status': log.status,
-                        'notes': log.notes,
-                        'created_at': log.created_at,
-                        'updated_at': log.updated_at
-                    })
+                # Select the sync columns directly, with the employee name
+                # joined in; rows come back ready to bind instead of being
+                # rebuilt field by field from ORM objects
+                rows = session.execute(
+                    select(
+                        TimeLog.id,
+                        TimeLog.employee_id,
+                        func.coalesce(Employee.name, 'Unknown').label('employee_name'),
+                        TimeLog.clock_in,
+                        TimeLog.clock_out,
+                        TimeLog.date,
+                        TimeLog.duration_hours,
+                        TimeLog.status,
+                        TimeLog.notes,
+                        TimeLog.created_at,
+                        TimeLog.updated_at
+                    )
+                    .outerjoin(Employee, Employee.id == TimeLog.employee_id)
+                    .where(TimeLog.created_at >= cutoff_time)
+                    .order_by(TimeLog.created_at.desc())
+                ).mappings()
                 
-                return time_log_data
+                return list(map(dict, rows))
                 
         except Exception as e:
             logger.error(f"❌ Failed to get recent SQLite time logs: {e}")
@@ -153,22 +164,22 @@ class SQLServerSyncService:
             with self.sqlite_db_manager.get_session() as session:
                 from models.database import SystemLog
                 
-                recent_logs = session.query(SystemLog).filter(
-                    SystemLog.timestamp >= cutoff_time
-                ).order_by(SystemLog.timestamp.desc()).all()
-                
-                system_log_data = []
-                for log in recent_logs:
-                    system_log_data.append({
-                        'id': log.id,
-                        'event_type': log.event_type,
-                        'employee_id': log.employee_id,
-                        'message': log.message,
-                        'details': log.get_details() if log.details else {},
-                        'timestamp': log.timestamp
-                    })
+                # details comes back already decoded by its JSONText column;
+                # missing details stay None, which the sync treats like {}
+                rows = session.execute(
+                    select(
+                        SystemLog.id,
+                        SystemLog.event_type,
+                        SystemLog.employee_id,
+                        SystemLog.message,
+                        SystemLog.details,
+                        SystemLog.timestamp
+                    )
+                    .where(SystemLog.timestamp >= cutoff_time)
+                    .order_by(SystemLog.timestamp.desc())
+                ).mappings()
                 
-                return system_log_data
+                return list(map(dict, rows))
                 
         except Exception as e:
             logger.error(f"❌ Failed to get recent SQLite system logs: {e}")
@@ -18,6 +18,13 @@ from db.connection import get_database_manager
 from utils.face_recognition_utils import FaceRecognitionManager
 from config.config import get_config
 
+# Optional TTL cache so expired cooldown entries drop out on their own
+try:
+    from cachetools import TTLCache
+    CACHETOOLS_AVAILABLE = True
+except ImportError:
+    CACHETOOLS_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,7 +46,11 @@ class TimeEntryManager:
         self.db_manager = get_database_manager(config_env)
         
         # Track recent recognitions to prevent duplicate entries
-        self.recent_recognitions = {}  # {employee_name: datetime}
+        # {employee_name: datetime}; entries only matter for one cooldown period
+        if CACHETOOLS_AVAILABLE:
+            self.recent_recognitions = TTLCache(maxsize=1024, ttl=self.config.COOLDOWN_MINUTES * 60)
+        else:
+            self.recent_recognitions = {}
         
         # Statistics
         self.stats = {
@@ -62,13 +73,16 @@ class TimeEntryManager:
         Returns:
             bool: True if within cooldown period
         """
-        if employee_name not in self.recent_recognitions:
+        last_recognition = self.recent_recognitions.get(employee_name)
+        if last_recognition is None:
             return False
         
-        last_recognition = self.recent_recognitions[employee_name]
-        cooldown_period = self.config.get_cooldown_timedelta()
+        if datetime.now() - last_recognition < self.config.get_cooldown_timedelta():
+            return True
         
-        return datetime.now() - last_recognition < cooldown_period
+        # Expired; drop it so the dict fallback doesn't grow without bound
+        self.recent_recognitions.pop(employee_name, None)
+        return False
     
     def update_recent_recognition(self, employee_name: str):
         """
@@ -79,6 +93,21 @@ class TimeEntryManager:
         """
         self.recent_recognitions[employee_name] = datetime.now()
     
+    def check(self, employee_name: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Check cooldown and, only if not in cooldown, the employee's status
+        
+        Args:
+            employee_name (str): Name of the employee
+            
+        Returns:
+            Tuple[bool, Optional[Dict]]: (in_cooldown, status); status is None
+            while the employee is in cooldown
+        """
+        if self.is_within_cooldown(employee_name):
+            return True, None
+        return False, self._get_database_status(employee_name)
+    
     def get_employee_status(self, employee_name: str) -> Dict:
         """
         Get current status of an employee
@@ -89,15 +118,26 @@ class TimeEntryManager:
         Returns:
             Dict: Employee status information
         """
-        try:
-            # Check cooldown first
-            if self.is_within_cooldown(employee_name):
-                return {
-                    'exists': True,
-                    'status': 'cooldown',
-                    'message': f'{employee_name} is in cooldown period'
-                }
+        in_cooldown, status = self.check(employee_name)
+        if in_cooldown:
+            return {
+                'exists': True,
+                'status': 'cooldown',
+                'message': f'{employee_name} is in cooldown period'
+            }
+        return status
+    
+    def _get_database_status(self, employee_name: str) -> Dict:
+        """
+        Get an employee's clock status from the database, ignoring cooldown
+        
+        Args:
+            employee_name (str): Name of the employee
             
+        Returns:
+            Dict: Employee status information
+        """
+        try:
             # Get employee from database
             employee = self.db_manager.get_employee_by_name(employee_name)
             
@@ -336,15 +376,13 @@ class TimeEntryManager:
                 self.stats['unknown_faces'] += 1
                 continue
             
-            # Check cooldown period
-            if self.is_within_cooldown(name):
+            # Check cooldown period and get employee status in one pass
+            in_cooldown, employee_status = self.check(name)
+            if in_cooldown:
                 self.stats['duplicate_preventions'] += 1
                 logger.info(f"⏰ Cooldown active for {name}, skipping recognition")
                 continue
             
-            # Get employee status and decide action
-            employee_status = self.get_employee_status(name)
-            
             if not employee_status['exists']:
                 results.append({
                     'employee_name': name,
@@ -9,6 +9,10 @@ import pandas as pd
 from datetime import datetime
 import os
 
+# employees.face_encoding holds raw float32 bytes, which are no use in a
+# CSV, so it's left out of the exports
+EXCLUDED_COLUMNS = ('face_encoding',)
+
 def connect_to_database():
     """Connect to the STES database"""
     db_path = 'stes.db'
@@ -181,7 +185,9 @@ def export_to_csv(conn):
     print("="*60)
     
     # Export employees
-    employees_df = pd.read_sql_query("SELECT * FROM employees", conn)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(employees)")
+               if row[1] not in EXCLUDED_COLUMNS]
+    employees_df = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM employees", conn)
     employees_df.to_csv('employees_export.csv', index=False)
     print("✅ Exported employees to: employees_export.csv")
     